@@ -4,15 +4,41 @@ Faculty Excel Converter Web Application
 Unified Flask app with API backend serving React 3D frontend
 """
 
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify, send_from_directory
+from flask import Flask, Request, Response, g, render_template, request, send_file, flash, redirect, url_for, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+import mimetypes
 import os
+import re
+import json
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from converter import FacultyConverter, ExcelUpdater
+import change_plan
+from excel_io import OUTPUT_FORMATS, preflight
+from result_cache import ResultCache, digest_key
+from jobs import JobQueue
+from datasets import DatasetStore, dataset_id
+from results import CATEGORIES, ResultIndex
+import metrics
 from datetime import datetime
+from time import perf_counter
+from uuid import uuid4
+
+
+class InMemoryUploadRequest(Request):
+    """Keeps uploaded roster (.txt) files in memory instead of spooling large ones to a temp file"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename and filename.lower().endswith('.txt'):
+            return BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 
 app = Flask(__name__, static_folder='frontend/build', static_url_path='')
+app.request_class = InMemoryUploadRequest
 CORS(app)
 app.secret_key = 'your-secret-key-change-in-production'
 app.config['UPLOAD_FOLDER'] = 'uploads'
@@ -23,177 +49,491 @@ ALLOWED_EXTENSIONS = {'txt', 'xlsx', 'xls'}
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# /analyze results by content hash of both rosters, shared by all workers through one SQLite file
+app.config['RESULT_CACHE_PATH'] = os.environ.get('RESULT_CACHE_PATH',
+                                                 os.path.join(app.instance_path, 'result_cache.sqlite3'))
+app.config['RESULT_CACHE_TTL'] = int(os.environ.get('RESULT_CACHE_TTL', 3600))
+result_cache = ResultCache(app.config['RESULT_CACHE_PATH'], ttl=app.config['RESULT_CACHE_TTL'])
+
+# Background /update-excel jobs: run on a local thread pool, status shared by all workers through SQLite
+app.config['JOB_DB_PATH'] = os.environ.get('JOB_DB_PATH', os.path.join(app.instance_path, 'jobs.sqlite3'))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 3600))
+job_queue = JobQueue(app.config['JOB_DB_PATH'], max_workers=app.config['JOB_WORKERS'], timeout=app.config['JOB_TIMEOUT'])
+
+# Rosters uploaded once to /datasets and then referred to by ID; parsed copies are kept in memory
+app.config['DATASET_DB_PATH'] = os.environ.get('DATASET_DB_PATH', os.path.join(app.instance_path, 'datasets.sqlite3'))
+app.config['DATASET_MEMORY_MB'] = int(os.environ.get('DATASET_MEMORY_MB', 64))
+dataset_store = DatasetStore(app.config['DATASET_DB_PATH'], budget_bytes=app.config['DATASET_MEMORY_MB'] * 1024 * 1024)
+
+
+@app.before_request
+def start_timer():
+    g.request_start = perf_counter()
+    g.timings_token = metrics.start_request_timings()
+
+
+@app.after_request
+def record_request(response):
+    """
+    Request count and latency per route (for streamed responses, the time until streaming starts),
+    and a Server-Timing header with the request's spans for the browser devtools
+    """
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if 'request_start' in g:
+        elapsed = perf_counter() - g.request_start
+        metrics.REQUEST_SECONDS.observe(elapsed, route)
+        response.headers['Server-Timing'] = metrics.server_timing(total=elapsed)
+    metrics.REQUESTS.inc(route, request.method, str(response.status_code))
+    metrics.REGISTRY.flush()
+    return response
+
+
+@app.teardown_request
+def stop_timings(exc=None):
+    if 'timings_token' in g:
+        metrics.end_request_timings(g.pop('timings_token'))
+
+
+def lru_lookup(cache_name, fn, *args):
+    """Call an lru_cache'd function and count whether it was a cache hit"""
+    hits = fn.cache_info().hits
+    value = fn(*args)
+    metrics.cache_lookup(cache_name, fn.cache_info().hits > hits)
+    return value
+
+
+# Content-hashed build output (assets/index-BIRxZXZd.js) never changes under the same name: Vite's
+# hash is the last dash-separated segment before the extension. Only assets/ is checked, so names
+# like favicon-original.ico from public/ are never taken for hashed ones
+HASHED_ASSET = re.compile(r'-[A-Za-z0-9_]{8}\.\w+$')
+# Pre-compressed variants written by compress_assets.py, in order of preference
+ASSET_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def send_asset(directory, path, hashed_names=False):
+    """
+    Static file with a pre-compressed variant when the client accepts one.
+    With hashed_names (the build's assets/ directory), hashed names are cached for a year as
+    immutable; everything else is revalidated by ETag.
+    """
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    hashed = hashed_names and bool(HASHED_ASSET.search(path))
+    for encoding, suffix in ASSET_ENCODINGS:
+        if request.accept_encodings[encoding] > 0 and os.path.isfile(safe_join(directory, path + suffix) or ''):
+            response = send_from_directory(directory, path + suffix, mimetype=mimetype, max_age=31536000 if hashed else 0)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, path, max_age=31536000 if hashed else 0)
+    response.vary.add('Accept-Encoding')
+    if hashed:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def request_rosters(file_fields, dataset_fields=('dataset1', 'dataset2')):
+    """
+    The two rosters of a request, each given either as an uploaded file or as
+    a dataset ID from /datasets (the ID wins when both are sent).
+
+    Returns:
+        tuple: ([(dataset ID, uploaded bytes or None) per roster], error message or None)
+    """
+    rosters = []
+    for file_field, dataset_field in zip(file_fields, dataset_fields):
+        key = request.form.get(dataset_field, '').strip().lower()
+        if key:
+            if not re.fullmatch(r'[0-9a-f]{64}', key):
+                return None, f'Invalid dataset ID: {key}'
+            rosters.append((key, None))
+            continue
+        upload = request.files.get(file_field)
+        if upload is None or upload.filename == '':
+            return None, 'Please upload both data files or give their dataset IDs'
+        if not allowed_file(upload.filename):
+            return None, 'Only .txt files are allowed for faculty data'
+        with metrics.span('upload_read'):
+            content = upload.read()
+        rosters.append((dataset_id(content), content))
+    return rosters, None
+
+
+def load_roster(key, content=None):
+    """Dataset for a request_rosters entry: parsed from the upload, or fetched by ID (None if unknown)"""
+    return dataset_store.parse(content, key) if content is not None else dataset_store.get(key)
+
+
+@lru_cache(maxsize=32)
+def result_index(result_id, created):
+    """Indexed copy of a stored /analyze result
+
+    Keyed on the entry's store time as well as its ID, so a memoized index is
+    never served once the entry expires or is stored again. KeyError (not
+    cached) when it is unknown or expired.
+    """
+    body = result_cache.get(result_id)
+    if body is None:
+        raise KeyError(result_id)
+    return ResultIndex(json.loads(body))
+
+
+def paged_summary(result):
+    """The counts and result_id of an /analyze result, without its lists (paged=true)"""
+    return {'summary': result['summary'], 'result_id': result['result_id']}
+
+
+def compare_rosters(dataset1, dataset2):
+    """Roster comparison in the (resigned, title changes, new hires) form ExcelUpdater takes"""
+    converter = FacultyConverter()
+    new_hires, resigned, title_changes, multiple_titles = converter.compare_faculty(
+        dataset1.faculty, dataset2.faculty, dataset1.index, dataset2.index
+    )
+    return ExcelUpdater.inputs_from_comparison(new_hires, resigned, title_changes)
+
+
+def analysis_records(dataset1, dataset2):
+    """
+    Streamed /analyze: one NDJSON line per change as soon as it is found
+    (type title_change, multiple_titles, new_hire or resigned, with the same
+    fields as the JSON lists), then a summary line with the counts.
+    """
+    counts = {'resignations': 0, 'new_hires': 0, 'title_changes': 0, 'multiple_titles': 0}
+    try:
+        for kind, name, detail in FacultyConverter().iter_changes(
+                dataset1.faculty, dataset2.faculty, dataset1.index, dataset2.index):
+            if kind == 'title_change':
+                counts['title_changes'] += 1
+                record = {'name': name, 'from': detail['from'], 'to': detail['to']}
+            elif kind == 'multiple_titles':
+                counts['multiple_titles'] += 1
+                record = {'name': name, 'year1': ", ".join(detail['year1']), 'year2': ", ".join(detail['year2'])}
+            elif kind == 'new_hire':
+                counts['new_hires'] += 1
+                record = {'name': name, 'title': detail}
+            else:
+                counts['resignations'] += 1
+                record = {'name': name, 'title': detail}
+            yield app.json.dumps({'type': kind, **record}) + '\n'
+    except Exception as e:
+        yield app.json.dumps({'type': 'error', 'error': f'Error analyzing files: {str(e)}'}) + '\n'
+        return
+    yield app.json.dumps({'type': 'summary', **counts}) + '\n'
+
+
+def update_job(excel_path, dataset1, dataset2, year_column, output_name, output_format, schema=None):
+    """
+    Background /update-excel: compare, update the workbook and remove the upload.
+
+    Returns:
+        dict: message, changes, output_path and download_name
+    """
+    try:
+        resigned_list, title_changes_dict, new_hires_dict = compare_rosters(dataset1, dataset2)
+        success, message, changes, output_path = ExcelUpdater.update_excel(
+            excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict,
+            output_name=output_name, output_format=output_format, schema=schema
+        )
+        if not success:
+            raise RuntimeError(message)
+        download_name = f"{output_name}_updated_{year_column.replace('-', '_')}{Path(output_path).suffix}"
+        return {'message': message, 'changes': changes, 'output_path': str(output_path),
+                'download_name': download_name}
+    finally:
+        try:
+            os.remove(excel_path)
+        except OSError:
+            pass
+
+
 @app.route('/')
 def index():
     """Serve the React 3D frontend"""
-    return send_from_directory('frontend/build', 'index.html')
+    return send_asset('frontend/build', 'index.html')
 
 
 @app.route('/assets/<path:path>')
 def send_assets(path):
     """Serve frontend assets"""
-    return send_from_directory('frontend/build/assets', path)
+    return send_asset('frontend/build/assets', path, hashed_names=True)
 
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    """API endpoint to analyze two txt files and return faculty changes"""
-    if 'file1' not in request.files or 'file2' not in request.files:
-        return jsonify({'error': 'Please upload both data files'}), 400
-
-    file1 = request.files['file1']
-    file2 = request.files['file2']
-
-    if file1.filename == '' or file2.filename == '':
-        return jsonify({'error': 'Please select both files'}), 400
-
-    if not (allowed_file(file1.filename) and allowed_file(file2.filename)):
-        return jsonify({'error': 'Only .txt files are allowed for faculty data'}), 400
-
-    # Save uploaded files
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    file1_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{timestamp}_1_{secure_filename(file1.filename)}')
-    file2_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{timestamp}_2_{secure_filename(file2.filename)}')
-
-    file1.save(file1_path)
-    file2.save(file2_path)
+    """API endpoint to analyze two txt files (or two dataset IDs) and return faculty changes"""
+    rosters, error = request_rosters(('file1', 'file2'))
+    if error:
+        return jsonify({'error': error}), 400
+    stream = (request.form.get('stream', '').strip().lower() in ('1', 'true', 'yes', 'on')
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    # Summary only: the client pages through the lists at /results/<result_id>
+    paged = request.form.get('paged', '').strip().lower() in ('1', 'true', 'yes', 'on')
 
     try:
-        # Parse and compare
+        # Parse and compare straight from the uploaded bytes; nothing is written to disk
         converter = FacultyConverter()
-        dict1 = converter.parse_txt_to_dict(file1_path)
-        dict2 = converter.parse_txt_to_dict(file2_path)
-        new_hires, resigned, title_changes, multiple_titles = converter.compare_faculty(dict1, dict2)
-
-        # Prepare data for response
-        resigned_list = []
-        for title, names in sorted(resigned.items()):
-            for name in names:
-                resigned_list.append({'name': name, 'title': title})
-
-        title_changes_list = []
-        for name, change in sorted(title_changes.items()):
-            title_changes_list.append({
-                'name': name,
-                'from': change['from'],
-                'to': change['to']
-            })
-
-        new_hires_list = []
-        for title, names in sorted(new_hires.items()):
-            for name in names:
-                new_hires_list.append({'name': name, 'title': title})
-
-        multiple_titles_list = []
-        for name, titles in sorted(multiple_titles.items()):
-            year1_titles = ", ".join(titles["year1"]) if isinstance(titles["year1"], list) else titles["year1"]
-            year2_titles = ", ".join(titles["year2"]) if isinstance(titles["year2"], list) else titles["year2"]
-            multiple_titles_list.append({
-                'name': name,
-                'year1': year1_titles,
-                'year2': year2_titles
-            })
-
-        summary = {
-            'resignations': len(resigned_list),
-            'new_hires': len(new_hires_list),
-            'title_changes': len(title_changes_list),
-            'multiple_titles': len(multiple_titles_list)
-        }
-
-        return jsonify({
-            'resigned': resigned_list,
-            'title_changes': title_changes_list,
-            'new_hires': new_hires_list,
-            'multiple_titles': multiple_titles_list,
-            'summary': summary
-        })
+        cache_key = digest_key(*(key for key, _ in rosters), cutoff=converter.cutoff)
+        cached = None if stream else result_cache.get(cache_key)
+        if not stream:
+            metrics.cache_lookup('analyze_result', cached is not None)
+        if cached is not None:
+            if paged:
+                return jsonify(paged_summary(json.loads(cached))), 200, {'X-Cache': 'HIT'}
+            return Response(cached, mimetype=app.json.mimetype, headers={'X-Cache': 'HIT'})
+
+        dataset1, dataset2 = (load_roster(key, content) for key, content in rosters)
+        if dataset1 is None or dataset2 is None:
+            return jsonify({'error': 'Unknown or expired dataset ID'}), 404
+
+        if stream:
+            # Records go out while the comparison runs; X-Accel-Buffering stops proxies from holding them back
+            return Response(analysis_records(dataset1, dataset2), mimetype='application/x-ndjson',
+                            headers={'X-Accel-Buffering': 'no'})
+
+        new_hires, resigned, title_changes, multiple_titles = converter.compare_faculty(
+            dataset1.faculty, dataset2.faculty, dataset1.index, dataset2.index
+        )
+
+        with metrics.span('response_build'):
+            # Prepare data for response
+            resigned_list = []
+            for title, names in sorted(resigned.items()):
+                for name in names:
+                    resigned_list.append({'name': name, 'title': title})
+
+            title_changes_list = []
+            for name, change in sorted(title_changes.items()):
+                title_changes_list.append({
+                    'name': name,
+                    'from': change['from'],
+                    'to': change['to']
+                })
+
+            new_hires_list = []
+            for title, names in sorted(new_hires.items()):
+                for name in names:
+                    new_hires_list.append({'name': name, 'title': title})
+
+            multiple_titles_list = []
+            for name, titles in sorted(multiple_titles.items()):
+                year1_titles = ", ".join(titles["year1"]) if isinstance(titles["year1"], list) else titles["year1"]
+                year2_titles = ", ".join(titles["year2"]) if isinstance(titles["year2"], list) else titles["year2"]
+                multiple_titles_list.append({
+                    'name': name,
+                    'year1': year1_titles,
+                    'year2': year2_titles
+                })
+
+            summary = {
+                'resignations': len(resigned_list),
+                'new_hires': len(new_hires_list),
+                'title_changes': len(title_changes_list),
+                'multiple_titles': len(multiple_titles_list)
+            }
+
+            result = {
+                'resigned': resigned_list,
+                'title_changes': title_changes_list,
+                'new_hires': new_hires_list,
+                'multiple_titles': multiple_titles_list,
+                'summary': summary,
+                # The cache key doubles as the ID for paging through this result at /results/<result_id>
+                'result_id': cache_key
+            }
+            with metrics.span('serialize'):
+                body = app.json.dumps(result)
+        result_cache.put(cache_key, body)
+        if paged:
+            return jsonify(paged_summary(result)), 200, {'X-Cache': 'MISS'}
+        return Response(body, mimetype=app.json.mimetype, headers={'X-Cache': 'MISS'})
 
     except Exception as e:
         return jsonify({'error': f'Error analyzing files: {str(e)}'}), 500
-    finally:
-        # Clean up uploaded files
-        try:
-            os.remove(file1_path)
-            os.remove(file2_path)
-        except:
-            pass
 
 
 @app.route('/update-excel', methods=['POST'])
 def update_excel():
     """API endpoint to update Excel file with faculty changes"""
-    if 'excel_file' not in request.files or 'data_file1' not in request.files or 'data_file2' not in request.files:
+    if 'excel_file' not in request.files:
         return jsonify({'error': 'Please upload all required files'}), 400
 
     excel_file = request.files['excel_file']
-    data_file1 = request.files['data_file1']
-    data_file2 = request.files['data_file2']
     year_column = request.form.get('year_column', '').strip()
+    dry_run = request.form.get('dry_run', '').strip().lower() in ('1', 'true', 'yes', 'on')
+    run_async = request.form.get('async', '').strip().lower() in ('1', 'true', 'yes', 'on')
+    output_format = request.form.get('output_format', 'xlsx').strip().lower() or 'xlsx'
 
     if not year_column:
         return jsonify({'error': 'Please specify the year column'}), 400
 
-    if excel_file.filename == '' or data_file1.filename == '' or data_file2.filename == '':
-        return jsonify({'error': 'Please select all files'}), 400
+    if output_format not in OUTPUT_FORMATS:
+        return jsonify({'error': f"Unsupported output format. Choose from: {', '.join(OUTPUT_FORMATS)}"}), 400
 
-    # Save uploaded files
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    excel_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{timestamp}_{secure_filename(excel_file.filename)}')
-    data1_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{timestamp}_1_{secure_filename(data_file1.filename)}')
-    data2_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{timestamp}_2_{secure_filename(data_file2.filename)}')
+    if excel_file.filename == '':
+        return jsonify({'error': 'Please select all files'}), 400
 
-    excel_file.save(excel_path)
-    data_file1.save(data1_path)
-    data_file2.save(data2_path)
+    # Rosters come as uploads (parsed in memory) or as dataset IDs
+    rosters, error = request_rosters(('data_file1', 'data_file2'))
+    if error:
+        return jsonify({'error': error}), 400
+    dataset1, dataset2 = (load_roster(key, content) for key, content in rosters)
+    if dataset1 is None or dataset2 is None:
+        return jsonify({'error': 'Unknown or expired dataset ID'}), 404
+
+    # Save the uploaded workbook (the random part keeps requests in the same second apart)
+    prefix = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid4().hex[:8]}"
+    excel_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{prefix}_{secure_filename(excel_file.filename)}')
+    with metrics.span('upload_read'):
+        excel_file.save(excel_path)
+    queued = False
 
     try:
-        # Parse and compare
-        converter = FacultyConverter()
-        dict1 = converter.parse_txt_to_dict(data1_path)
-        dict2 = converter.parse_txt_to_dict(data2_path)
-        new_hires, resigned, title_changes, multiple_titles = converter.compare_faculty(dict1, dict2)
-
-        # Convert to format expected by ExcelUpdater
-        resigned_list = []
-        for title, names in resigned.items():
-            resigned_list.extend(names)
-
-        title_changes_dict = {}
-        for name, change in title_changes.items():
-            title_changes_dict[name] = f"{change['from']} -> {change['to']}"
-
-        new_hires_dict = {}
-        for title, names in new_hires.items():
-            for name in names:
-                new_hires_dict[name] = title
+        # Check the workbook's header before the roster comparison and full load;
+        # the update reuses the resolved schema instead of reading the header again
+        schema, error = preflight(excel_path, year_column, sheet_name='Sheet1')
+        if error:
+            return jsonify({'error': error}), 400
+
+        output_name = Path(secure_filename(excel_file.filename)).stem
+        if run_async and not dry_run:
+            # The job owns the uploaded workbook from here on and removes it when it finishes
+            job_id = job_queue.submit(update_job, excel_path, dataset1, dataset2, year_column,
+                                      output_name, output_format, schema)
+            queued = True
+            status_url = url_for('job_status', job_id=job_id)
+            return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url}), 202, \
+                {'Location': status_url}
+
+        # Compare
+        resigned_list, title_changes_dict, new_hires_dict = compare_rosters(dataset1, dataset2)
+
+        if dry_run:
+            # Preview only: return the change plan without writing a workbook
+            success, message, plan, matches = ExcelUpdater.plan_excel(
+                excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict, schema=schema
+            )
+            if not success:
+                return jsonify({'error': message}), 500
+            with metrics.span('response_build'):
+                return jsonify({
+                    'changes': change_plan.plan_to_records(plan),
+                    'summary': change_plan.summarize_plan(plan),
+                    'fuzzy_matches': [{'input': name, 'matched': match.name, 'score': round(match.score, 3)}
+                                      for name, match in matches]
+                })
 
         # Update Excel
         success, message, changes, output_path = ExcelUpdater.update_excel(
-            excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict
+            excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict,
+            output_name=output_name, output_format=output_format, schema=schema
         )
 
         if success:
             # Return the updated file
-            return send_file(output_path, as_attachment=True, download_name=Path(output_path).name)
+            download_name = f"{output_name}_updated_{year_column.replace('-', '_')}{Path(output_path).suffix}"
+            return send_file(output_path, as_attachment=True, download_name=download_name)
         else:
             return jsonify({'error': message}), 500
 
     except Exception as e:
         return jsonify({'error': f'Error updating Excel: {str(e)}'}), 500
     finally:
-        # Clean up uploaded files (keep output file for download)
-        try:
-            os.remove(excel_path)
-            os.remove(data1_path)
-            os.remove(data2_path)
-        except:
-            pass
+        # Clean up the uploaded workbook (keep output file for download)
+        if not queued:
+            try:
+                os.remove(excel_path)
+            except:
+                pass
+
+
+@app.route('/results/<result_id>')
+def results_page(result_id):
+    """API endpoint to page through a stored /analyze result with filters"""
+    categories = [c.strip() for c in request.args.get('category', '').split(',') if c.strip()]
+    unknown = [c for c in categories if c not in CATEGORIES]
+    if unknown:
+        return jsonify({'error': f"Unknown category: {', '.join(unknown)}. Choose from: {', '.join(CATEGORIES)}"}), 400
+    try:
+        cursor = int(request.args.get('cursor', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'cursor and limit must be integers'}), 400
+
+    created = result_cache.created(result_id)
+    try:
+        if created is None:
+            raise KeyError(result_id)
+        index = lru_lookup('result_index', result_index, result_id, created)
+    except KeyError:
+        return jsonify({'error': 'Unknown or expired result'}), 404
+
+    items, total, next_cursor = index.page(
+        categories, title=request.args.get('title') or None, name_prefix=request.args.get('name') or None,
+        cursor=cursor, limit=limit
+    )
+    return jsonify({'result_id': result_id, 'items': items, 'total': total, 'next_cursor': next_cursor})
+
+
+@app.route('/datasets', methods=['POST'])
+def upload_dataset():
+    """API endpoint to parse and index a roster once; returns the dataset ID to use instead of the file"""
+    upload = request.files.get('file')
+    if upload is None or upload.filename == '':
+        return jsonify({'error': 'Please upload a data file'}), 400
+    if not allowed_file(upload.filename):
+        return jsonify({'error': 'Only .txt files are allowed for faculty data'}), 400
+
+    try:
+        dataset = dataset_store.add(upload.read())
+    except Exception as e:
+        return jsonify({'error': f'Error parsing file: {str(e)}'}), 400
+    return jsonify({
+        'dataset_id': dataset.id,
+        'titles': len(dataset.faculty),
+        'names': sum(len(names) for names in dataset.faculty.values())
+    }), 201
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint: request, stage latency, fuzzy comparison and cache metrics"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """API endpoint to poll a background /update-excel job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    response = {key: job[key] for key in ('id', 'status', 'created', 'updated', 'error')}
+    if job['status'] == 'done':
+        response['message'] = job['result']['message']
+        response['changes'] = job['result']['changes']
+        response['download_url'] = url_for('job_download', job_id=job_id)
+    return jsonify(response)
+
+
+@app.route('/jobs/<job_id>/download')
+def job_download(job_id):
+    """API endpoint to download the workbook of a finished job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+
+    result = job['result']
+    if not os.path.exists(result['output_path']):
+        return jsonify({'error': 'Output file is no longer available'}), 410
+    return send_file(result['output_path'], as_attachment=True, download_name=result['download_name'])
 
 
 @app.route('/create-template', methods=['POST'])
@@ -205,15 +545,11 @@ def create_template():
     if not year_columns:
         return jsonify({'error': 'Please specify at least one year column'}), 400
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_path = os.path.join(app.config['UPLOAD_FOLDER'], f'faculty_template_{timestamp}.xlsx')
-
     try:
-        success, message = ExcelUpdater.create_base_template(output_path, year_columns)
-        if success:
-            return send_file(output_path, as_attachment=True, download_name='faculty_template.xlsx')
-        else:
-            return jsonify({'error': message}), 500
+        # Served from the in-memory template cache, nothing is written to disk
+        template = lru_lookup('template', ExcelUpdater.template_bytes, tuple(year_columns))
+        return send_file(BytesIO(template), as_attachment=True, download_name='faculty_template.xlsx',
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     except Exception as e:
         return jsonify({'error': f'Error creating template: {str(e)}'}), 500
 
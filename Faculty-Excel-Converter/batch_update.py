@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Batch Excel Updater
+Applies roster changes to every workbook in a directory tree in parallel:
+one process-pool task per roster comparison and one per workbook (read,
+update every sheet, write), with a single summary of all changes at the end.
+Workbooks whose sheets have no real changes are not written.
+
+Each workbook is updated from the roster pair next to it
+(sampledata1.txt -> sampledata2.txt by default). With --rollover the new
+year columns are added to every sheet first (seeded from the previous year),
+including workbooks that have no roster pair yet.
+
+Usage: python batch_update.py ROOT [--year-column 2024-2025] [--rollover 2025-2026] [--workers 4] [--dry-run]
+"""
+
+import argparse
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import change_plan
+import excel_io
+from converter import FacultyConverter, ExcelUpdater
+from name_index import describe_match
+from workbook_analysis import year_columns
+
+# Content-addressed outputs written by ExcelUpdater / earlier batch runs
+OUTPUT_STEM = re.compile(r'_updated_.+_[0-9a-f]{16}$')
+SUMMARY_COLUMNS = ['workbook', 'sheet', 'year_column'] + change_plan.PLAN_COLUMNS
+
+
+def find_workbooks(root):
+    """Workbooks under root, skipping our own outputs, temp files and Excel lock files"""
+    for path in sorted(Path(root).rglob('*.xlsx')):
+        if path.name.startswith(('.', '~$')) or OUTPUT_STEM.search(path.stem):
+            continue
+        yield path
+
+
+def compare_rosters(old_roster, new_roster, cutoff=0.85):
+    """Pool task: fuzzy-compare a roster pair into update_excel inputs"""
+    converter = FacultyConverter(cutoff)
+    new_hires, resigned, title_changes, _ = converter.compare_faculty(
+        converter.parse_txt_to_dict(old_roster), converter.parse_txt_to_dict(new_roster)
+    )
+    return ExcelUpdater.inputs_from_comparison(new_hires, resigned, title_changes)
+
+
+def update_sheet(df, year_column, changes, rollover=None):
+    """
+    Pool task: plan and apply the changes to one sheet.
+
+    Sheets without a faculty name column (any of excel_io.NAME_COLUMN_ALIASES)
+    or year column are passed through unchanged; an aliased name column is
+    renamed to 'Faculty name', as in ExcelUpdater.load_sheet. When
+    year_column is None the sheet's latest year column is used. Names missing
+    from the sheet are resolved through its fuzzy name index and listed in
+    the note. rollover columns are added before the changes are planned, so
+    the latest year column is then the newest of them.
+
+    Returns:
+        (DataFrame, DataFrame, str): Updated sheet, change plan (or None), note
+    """
+    name_column = excel_io.find_name_column(df.columns)
+    if df.empty or name_column is None:
+        return df, None, "skipped: no faculty name column"
+    df = df.rename(columns={name_column: 'Faculty name'})
+    if rollover and year_columns(df):
+        df = ExcelUpdater.rollover(df, rollover)
+
+    year = year_column or next(iter(year_columns(df)[::-1]), None)
+    if year not in df.columns:
+        return df, None, f"skipped: '{year_column or 'year'}' column not found"
+
+    *changes, matches = ExcelUpdater.resolve_names(df, *changes)
+    plan = change_plan.annotate_matches(ExcelUpdater.plan_changes(df, year, *changes), matches)
+    note = '; '.join(describe_match(name, match) for name, match in matches) or None
+    return ExcelUpdater.apply_plan(df, plan, year), plan.assign(year_column=year), note
+
+
+def update_workbook(workbook, year_column, changes, rollover=None, output_path=None, write_mode='frame'):
+    """
+    Pool task: read, update and write one workbook, so its sheets never cross process boundaries.
+
+    Every sheet goes through update_sheet. The workbook is written to
+    output_path only when something changed: a plan row with a new value, or
+    rollover columns added. No write when output_path is None (dry runs and
+    outputs that already exist) or when a sheet failed.
+
+    Returns:
+        (list, str, list): (sheet name, plan) per updated sheet, written path (or None), notes
+    """
+    plans, frames, highlights, notes = [], [], {}, []
+    changed = failed = False
+    for sheet_name, df in excel_io.read_workbook(workbook).items():
+        try:
+            updated, plan, note = update_sheet(df, year_column, changes, rollover)
+        except Exception as e:
+            updated, plan, note = df, None, f"failed: {e}"
+            failed = True
+        frames.append((sheet_name, updated))
+        changed = changed or len(updated.columns) > len(df.columns)
+        if plan is not None:
+            plans.append((sheet_name, plan))
+            changed = changed or not change_plan.effective_changes(plan).empty
+            if not plan.empty:
+                highlights[sheet_name] = change_plan.plan_highlights(plan, updated.columns, plan['year_column'].iat[0])
+        if note:
+            notes.append(f"{workbook} [{sheet_name}]: {note}")
+
+    if output_path is None or failed:
+        return plans, None, notes
+    if not changed:
+        notes.append(f"{workbook}: no changes, not written")
+        return plans, None, notes
+    written = excel_io.write_atomic(output_path, lambda tmp_path: excel_io.write_excel(
+        tmp_path, frames, mode=write_mode, source=workbook, highlights=highlights))
+    return plans, written, notes
+
+
+def run_batch(root, year_column=None, workers=None, dry_run=False,
+              old_roster='sampledata1.txt', new_roster='sampledata2.txt', cutoff=0.85, write_mode='frame', rollover=None):
+    """
+    Update every workbook under root in parallel.
+
+    Args:
+        root (str): Directory tree to search for .xlsx workbooks
+        year_column (str): Column to update (default: latest year column of each sheet)
+        workers (int): Process pool size (default: number of CPUs)
+        dry_run (bool): Plan only, write no workbooks
+        old_roster, new_roster (str): Roster file names next to each workbook
+        cutoff (float): Fuzzy matching cutoff for the roster comparison
+        write_mode (str): 'frame', 'stream' or 'patch' (see excel_io.write_excel)
+        rollover (list): New year columns to add to every sheet before updating
+
+    Returns:
+        (DataFrame, list, list): Change summary, written output paths, notes
+    """
+    plans, outputs, notes = [], [], []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        compare_futures, update_futures = {}, {}
+
+        def submit_update(workbook, changes):
+            # Identical inputs were written before: still plan (for the summary), skip the write
+            output = ExcelUpdater.output_path_for(workbook, year_column or 'latest', *changes,
+                                                  rollover=rollover, write_mode=write_mode)
+            if output.exists() and not dry_run:
+                notes.append(f"{workbook}: already up to date ({output.name})")
+            output = None if dry_run or output.exists() else output
+            future = pool.submit(update_workbook, workbook, year_column, changes, rollover, output, write_mode)
+            update_futures[future] = workbook
+
+        for workbook in find_workbooks(root):
+            old_path, new_path = workbook.parent / old_roster, workbook.parent / new_roster
+            if old_path.exists() and new_path.exists():
+                compare_futures[pool.submit(compare_rosters, old_path, new_path, cutoff)] = workbook
+            elif rollover:
+                # No rosters yet: roll the year columns over without changes
+                submit_update(workbook, ExcelUpdater.inputs_from_comparison({}, {}, {}))
+            else:
+                notes.append(f"{workbook}: skipped, no {old_roster}/{new_roster} next to it")
+
+        # One read-update-write task per workbook as soon as its roster comparison is done
+        for future in as_completed(compare_futures):
+            workbook = compare_futures[future]
+            try:
+                changes = future.result()
+            except Exception as e:
+                notes.append(f"{workbook}: roster comparison failed: {e}")
+                continue
+            submit_update(workbook, changes)
+
+        for future in as_completed(update_futures):
+            workbook = update_futures[future]
+            try:
+                sheet_plans, output, workbook_notes = future.result()
+            except Exception as e:
+                notes.append(f"{workbook}: update failed: {e}")
+                continue
+            plans += [plan.assign(workbook=str(workbook), sheet=sheet_name) for sheet_name, plan in sheet_plans]
+            outputs += [output] if output else []
+            notes += workbook_notes
+
+    summary = pd.concat(plans, ignore_index=True) if plans else change_plan.make_plan().assign(
+        year_column=None, workbook=None, sheet=None)
+    summary = summary[SUMMARY_COLUMNS].sort_values(['workbook', 'sheet'], kind='stable', ignore_index=True)
+    return summary, sorted(outputs), sorted(notes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update every faculty workbook in a directory tree in parallel")
+    parser.add_argument('root', help="Directory to search for .xlsx workbooks")
+    parser.add_argument('--year-column', help="Year column to update (default: latest year column of each sheet)")
+    parser.add_argument('--workers', type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--old-roster', default='sampledata1.txt', help="Earlier roster file next to each workbook")
+    parser.add_argument('--new-roster', default='sampledata2.txt', help="Later roster file next to each workbook")
+    parser.add_argument('--cutoff', type=float, default=0.85, help="Fuzzy matching cutoff")
+    parser.add_argument('--summary', help="CSV file for the change summary (default: ROOT/batch_summary.csv)")
+    parser.add_argument('--dry-run', action='store_true', help="Plan only, write no workbooks")
+    parser.add_argument('--write-mode', choices=excel_io.WRITE_MODES, default='frame',
+                        help="'stream' writes rows through a constant-memory writer, "
+                             "'patch' keeps each workbook's formatting")
+    parser.add_argument('--rollover', nargs='+', metavar='YEAR',
+                        help="New year columns to add to every sheet (seeded from the previous year) before updating")
+    args = parser.parse_args()
+
+    summary, outputs, notes = run_batch(
+        args.root, args.year_column, args.workers, args.dry_run, args.old_roster, args.new_roster, args.cutoff, args.write_mode,
+        args.rollover
+    )
+
+    summary_path = args.summary or str(Path(args.root) / 'batch_summary.csv')
+    excel_io.write_atomic(summary_path, lambda tmp_path: summary.to_csv(tmp_path, index=False))
+
+    print("Batch Excel Update" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    if not summary.empty:
+        counts = summary.groupby(['workbook', 'action'], observed=True).size().unstack(fill_value=0)
+        print(counts.reindex(columns=change_plan.ACTIONS, fill_value=0).to_string())
+    print(f"\nTotal changes: {len(summary)} | Workbooks written: {len(outputs)}")
+    for output in outputs:
+        print(f"  - {output}")
+    if notes:
+        print("\nNotes:")
+        for note in notes:
+            print(f"  - {note}")
+    print(f"\nSummary saved to {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
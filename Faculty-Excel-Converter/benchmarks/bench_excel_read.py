@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Excel Read Benchmark
+Times every installed reader backend on the university workbooks in this repo.
+
+Usage: python benchmarks/bench_excel_read.py [--repeat N] [workbook ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import excel_io  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def time_reader(reader_name, workbooks, repeat):
+    """Return the best total wall time (seconds) for reading every workbook"""
+    reader = excel_io.get_reader(reader_name)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for workbook in workbooks:
+            for sheet in reader.sheet_names(workbook):
+                reader.read_sheet(workbook, sheet)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Excel reader backends")
+    parser.add_argument('workbooks', nargs='*', help="Workbooks to read (default: all university workbooks)")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per backend; best run is reported")
+    args = parser.parse_args()
+
+    workbooks = [Path(w) for w in args.workbooks] or sorted(REPO_ROOT.glob('*/*.xlsx'))
+    if not workbooks:
+        print("No workbooks found.")
+        return
+
+    readers = excel_io.available_readers()
+    print(f"Workbooks: {len(workbooks)} | Backends: {', '.join(readers)} | Best of {args.repeat}")
+    print("=" * 60)
+
+    results = {name: time_reader(name, workbooks, args.repeat) for name in readers}
+    baseline = results.get('openpyxl')
+    for name, seconds in results.items():
+        speedup = f"{baseline / seconds:.1f}x" if baseline else "-"
+        print(f"  {name:<10} {seconds * 1000:9.1f} ms   speedup vs openpyxl: {speedup}")
+
+    print(f"\nDefault backend: {excel_io.get_reader().name}")
+
+
+if __name__ == "__main__":
+    main()
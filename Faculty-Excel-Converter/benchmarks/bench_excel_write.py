@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Excel Write Benchmark
+Peak memory and time of the 'frame', 'stream' and 'patch' write modes for growing row counts.
+Every measurement runs in a fresh process so peak RSS is not shared between runs.
+
+Usage: python benchmarks/bench_excel_write.py [--rows 10000 50000 100000]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def synthetic_sheet(rows, years=20):
+    """Faculty-shaped frame: name, department and one title column per year"""
+    import numpy as np
+    import pandas as pd
+
+    titles = np.array(['Professor', 'Associate Professor', 'Assistant Professor', 'N'])
+    rng = np.random.default_rng(0)
+    data = {
+        'Faculty name': [f"Faculty {i}" for i in range(rows)],
+        'Department': 'Engineering',
+    }
+    for year in range(2000, 2000 + years):
+        data[f"{year}-{year + 1}"] = titles[rng.integers(0, len(titles), rows)]
+    return pd.DataFrame(data)
+
+
+def measure(mode, rows):
+    """Child process: write the synthetic sheet and print 'seconds extra_peak_mb'"""
+    import excel_io
+
+    df = synthetic_sheet(rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 'patch' rewrites an existing workbook, so give it the original to start from
+        source = Path(tmp_dir) / 'source.xlsx'
+        if mode == 'patch':
+            excel_io.write_excel(source, df, mode='stream')
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        excel_io.write_excel(Path(tmp_dir) / 'out.xlsx', df, mode=mode, source=source)
+        elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {(peak - baseline) / 1024:.1f}")  # ru_maxrss is in KiB on Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Excel write modes")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 50_000, 100_000])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.child[0], int(args.child[1]))
+        return
+
+    import excel_io
+
+    print(f"{'rows':>8} {'mode':<7} {'seconds':>8} {'extra peak MB':>14}")
+    print("=" * 40)
+    for rows in args.rows:
+        for mode in excel_io.WRITE_MODES:
+            result = subprocess.run([sys.executable, __file__, '--child', mode, str(rows)],
+                                    capture_output=True, text=True, check=True)
+            seconds, peak_mb = result.stdout.split()
+            print(f"{rows:>8} {mode:<7} {float(seconds):>8.2f} {float(peak_mb):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
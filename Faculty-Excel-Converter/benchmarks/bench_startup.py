@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Cold import time of the app and the converter modules, and whether pandas
+was loaded by the import. Every measurement runs in a fresh process, as a
+cold start on Render does.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+MODULES = ['converter', 'workbook_analysis', 'datasets', 'app']
+
+CHILD = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(f"{{elapsed:.4f}} {{'pandas' in sys.modules}}")
+"""
+
+
+def measure(module):
+    """Seconds to import module in a fresh interpreter, and whether pandas got imported"""
+    result = subprocess.run([sys.executable, '-c', CHILD.format(module=module)],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+    seconds, pandas_loaded = result.stdout.split()
+    return float(seconds), pandas_loaded == 'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time")
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per module (the best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'module':<18} {'best ms':>8} {'median ms':>10} {'pandas':>7}")
+    print("=" * 46)
+    for module in MODULES:
+        runs = [measure(module) for _ in range(args.repeat)]
+        times = sorted(seconds for seconds, _ in runs)
+        pandas_loaded = any(loaded for _, loaded in runs)
+        print(f"{module:<18} {times[0] * 1000:>8.1f} {times[len(times) // 2] * 1000:>10.1f} "
+              f"{'yes' if pandas_loaded else 'no':>7}")
+
+
+if __name__ == "__main__":
+    main()
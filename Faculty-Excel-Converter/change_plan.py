@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Change Plan Module
+Typed, columnar records of the edits an Excel update makes (or would make)
+"""
+
+RESIGNED = 'RESIGNED'
+TITLE_CHANGE = 'TITLE CHANGE'
+UPDATED = 'UPDATED'
+NEW_HIRE = 'NEW HIRE'
+ACTIONS = [RESIGNED, TITLE_CHANGE, UPDATED, NEW_HIRE]
+
+# matched_as/score: the input name and similarity when the row was found by fuzzy matching
+PLAN_COLUMNS = ['action', 'name', 'row', 'old', 'new', 'matched_as', 'score']
+
+# Fill colour per action for highlighted outputs (Excel's light red / yellow / blue / green)
+HIGHLIGHT_COLORS = {
+    RESIGNED: 'FFC7CE',
+    TITLE_CHANGE: 'FFEB9C',
+    UPDATED: 'DDEBF7',
+    NEW_HIRE: 'C6EFCE',
+}
+
+
+def make_plan(records=()):
+    """
+    Build a change plan DataFrame.
+
+    Args:
+        records (iterable): dicts (or tuples) of action, name, row, old, new
+            and optionally matched_as, score. 'row' is the DataFrame index the
+            change applies to; for new hires it is the index the appended row
+            will get.
+
+    Returns:
+        DataFrame: columns action (categorical), name, row (Int64), old, new,
+            matched_as, score (Float64; both missing for exact matches)
+    """
+    import pandas as pd
+    rows = [record if isinstance(record, dict) else dict(zip(PLAN_COLUMNS, record)) for record in records]
+    plan = pd.DataFrame(rows, columns=PLAN_COLUMNS)
+    return plan.astype({
+        'action': pd.CategoricalDtype(ACTIONS),
+        'name': 'string',
+        'row': 'Int64',
+        'old': 'string',
+        'new': 'string',
+        'matched_as': 'string',
+        'score': 'Float64',
+    })
+
+
+def annotate_matches(plan, matches):
+    """
+    Copy of the plan with matched_as and score set on the rows of fuzzily resolved names.
+
+    Args:
+        matches (list): (input name, name_index.Match) for every fuzzy resolution
+    """
+    plan = plan.copy()
+    for query, match in matches:
+        rows = plan['name'] == match.name
+        plan.loc[rows, 'matched_as'] = query
+        plan.loc[rows, 'score'] = match.score
+    return plan
+
+
+def effective_changes(plan):
+    """Rows of the plan that change a cell (no-ops, where the new value equals the old one, dropped)"""
+    same = (plan['old'] == plan['new']).fillna(False) | (plan['old'].isna() & plan['new'].isna())
+    return plan[~same]
+
+
+def describe_change(action, name, old, new):
+    """Human-readable line for one change, e.g. 'RESIGNED: name: old → N'"""
+    import pandas as pd
+    if action == NEW_HIRE:
+        return f"{NEW_HIRE}: {name} as {new}"
+    if pd.isna(old):
+        old = 'nan'  # blank cell, printed the way the updaters always have
+    return f"{action}: {name}: {old} → {new}"
+
+
+def describe_plan(plan):
+    """List of human-readable lines for every change in the plan"""
+    return [describe_change(action, name, old, new)
+            for action, name, old, new in zip(plan['action'], plan['name'], plan['old'], plan['new'])]
+
+
+def summarize_plan(plan):
+    """Number of changes per action (every action present, zero when unused)"""
+    return {action: int(count) for action, count in plan['action'].value_counts().reindex(ACTIONS, fill_value=0).items()}
+
+
+def plan_to_records(plan):
+    """JSON-friendly list of dicts (missing values become None)"""
+    return plan.astype(object).where(plan.notna(), None).to_dict(orient='records')
+
+
+def _row_runs(rows):
+    """(first, last) of every run of consecutive row numbers"""
+    import numpy as np
+    rows = np.unique(rows)
+    if not len(rows):
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    return [(int(run[0]), int(run[-1])) for run in np.split(rows, breaks)]
+
+
+def plan_highlights(plan, columns, year_column):
+    """
+    Cell ranges to highlight for a plan, grouped by fill colour.
+
+    No-op rows (new value equal to the old one) are not highlighted.
+    Changed cells of the year column are collapsed into runs of consecutive
+    rows and new hires into whole-row blocks, so a writer needs one range
+    list per action no matter how many changes there are.
+
+    Args:
+        plan (DataFrame): Change plan (rows are 0-based data rows of the sheet)
+        columns (list): Column order of the written sheet
+        year_column (str): Column the plan changes
+
+    Returns:
+        dict: colour -> list of (first_row, first_col, last_row, last_col), 0-based
+    """
+    plan = effective_changes(plan)
+    columns = list(columns)
+    column = columns.index(year_column)
+    highlights = {}
+    for action, color in HIGHLIGHT_COLORS.items():
+        rows = plan.loc[plan['action'] == action, 'row'].dropna().astype('int64').to_numpy()
+        first_col, last_col = (0, len(columns) - 1) if action == NEW_HIRE else (column, column)
+        ranges = [(first, first_col, last, last_col) for first, last in _row_runs(rows)]
+        if ranges:
+            highlights[color] = ranges
+    return highlights
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compress Assets
+Writes gzip (.gz) and, when the optional `brotli` package is installed,
+brotli (.br) copies of the built frontend files next to the originals. The
+app serves these variants to clients that accept them, so nothing is
+compressed per request.
+
+Run after `npm run build`:
+    python compress_assets.py [frontend/build]
+"""
+
+import argparse
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone is still served
+    brotli = None
+
+COMPRESSIBLE = {'.js', '.css', '.html', '.svg', '.json', '.txt', '.map', '.ico'}
+MIN_SIZE = 1024  # below this the compression saving is lost in header overhead
+
+
+def compressed_variants(data):
+    """(suffix, bytes) for every available encoding of data"""
+    # mtime=0 keeps the .gz bytes identical across builds of the same file
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    return variants
+
+
+def compress_directory(build_dir):
+    """
+    Write compressed variants for the compressible files under build_dir.
+
+    Stale variants are rewritten; a variant is only kept when it is smaller
+    than the original.
+
+    Returns:
+        list: (path, original size, {suffix: compressed size}) per compressed file
+    """
+    report = []
+    for path in sorted(Path(build_dir).rglob('*')):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE or path.stat().st_size < MIN_SIZE:
+            continue
+        data = path.read_bytes()
+        sizes = {}
+        for suffix, compressed in compressed_variants(data):
+            target = path.with_name(path.name + suffix)
+            if len(compressed) >= len(data):
+                target.unlink(missing_ok=True)
+                continue
+            target.write_bytes(compressed)
+            sizes[suffix] = len(compressed)
+        report.append((path, len(data), sizes))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-compress the built frontend assets")
+    parser.add_argument('build_dir', nargs='?', default=str(Path(__file__).resolve().parent / 'frontend' / 'build'))
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli not installed: writing gzip variants only (pip install brotli for .br)")
+    for path, size, sizes in compress_directory(args.build_dir):
+        variants = ", ".join(f"{suffix} {compressed / 1024:.1f} KB" for suffix, compressed in sizes.items())
+        print(f"{path.relative_to(args.build_dir)}: {size / 1024:.1f} KB -> {variants or 'not smaller, skipped'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,16 @@ Converts txt input files to Excel format with faculty changes tracking
 
 from collections import defaultdict
 from difflib import get_close_matches
-import pandas as pd
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 
+import change_plan
+import excel_io
+import metrics
+from name_index import NameIndex, describe_match
+from workbook_analysis import year_columns
+
 
 class FacultyConverter:
     """Handles faculty data parsing and comparison"""
@@ -16,37 +23,56 @@ class FacultyConverter:
     def __init__(self, cutoff=0.85):
         self.cutoff = cutoff
 
-    def parse_txt_to_dict(self, file_path):
+    @staticmethod
+    def _roster_lines(source):
+        """Lines of a roster given as a path, as bytes, or as a text or binary file-like object"""
+        if isinstance(source, (bytes, bytearray)):
+            return source.decode('utf-8').splitlines()
+        if hasattr(source, 'read'):
+            content = source.read()
+            return (content.decode('utf-8') if isinstance(content, bytes) else content).splitlines()
+        with open(source, "r") as file:
+            return file.read().splitlines()
+
+    @metrics.timed('parse')
+    def parse_txt_to_dict(self, source):
         """
-        Parse faculty data from txt file into a dictionary.
+        Parse faculty data from a txt roster into a dictionary.
         Format: Title: Name1, Name2, Name3
+
+        Args:
+            source: Path of the txt file, its content as bytes, or a file-like
+                object (e.g. an uploaded file's stream) read in memory
         """
         faculty_dict = {}
-        with open(file_path, "r") as file:
-            for line in file:
-                line = line.strip()
-                if ":" in line:
-                    parts = line.split(":", 1)
-                    title = parts[0].strip()
-                    names_string = parts[1].strip()
-                    if names_string:
-                        names_list = [name.strip() for name in names_string.split(',') if name.strip()]
-                    else:
-                        names_list = []
-                    faculty_dict[title] = names_list
+        for line in self._roster_lines(source):
+            line = line.strip()
+            if ":" in line:
+                parts = line.split(":", 1)
+                title = parts[0].strip()
+                names_string = parts[1].strip()
+                if names_string:
+                    names_list = [name.strip() for name in names_string.split(',') if name.strip()]
+                else:
+                    names_list = []
+                faculty_dict[title] = names_list
         return faculty_dict
 
+    @metrics.timed('fuzzy_match')
     def match_name(self, name, name_set, cutoff=None):
         """Find a matching name using fuzzy matching"""
         if cutoff is None:
             cutoff = self.cutoff
+        metrics.FUZZY_COMPARISONS.inc('roster', amount=len(name_set))
         matches = get_close_matches(name.strip(), [n.strip() for n in name_set], n=1, cutoff=cutoff)
         return matches[0] if matches else None
 
+    @metrics.timed('unusual_scan')
     def find_unusual_patterns(self, dict1, dict2, cutoff=0.75):
         """Find names that are very similar but not exact matches"""
         names1 = {name.strip() for names in dict1.values() for name in names}
         names2 = {name.strip() for names in dict2.values() for name in names}
+        metrics.FUZZY_COMPARISONS.inc('unusual', amount=len(names1) * len(names2))
         unusual = defaultdict(list)
         for name1 in names1:
             close_matches = get_close_matches(name1, names2, n=3, cutoff=cutoff)
@@ -55,9 +81,34 @@ class FacultyConverter:
                     unusual[name1].append(match)
         return unusual
 
-    def compare_faculty(self, dict1, dict2):
+    @staticmethod
+    def roster_index(faculty_dict):
+        """
+        Lookups compare_faculty needs for one roster, built once so a parsed
+        roster can be compared many times.
+
+        Returns:
+            tuple: (title map: name -> title, or list of titles for names
+                listed several times; set of stripped names)
+        """
+        title_map = {}
+        for title, names in faculty_dict.items():
+            for name in names:
+                if name in title_map:
+                    if isinstance(title_map[name], list):
+                        title_map[name].append(title)
+                    else:
+                        title_map[name] = [title_map[name], title]
+                else:
+                    title_map[name] = title
+        all_names = set(name.strip() for names in faculty_dict.values() for name in names)
+        return title_map, all_names
+
+    @metrics.timed('compare')
+    def compare_faculty(self, dict1, dict2, index1=None, index2=None):
         """
         Compare two faculty dictionaries to find changes.
+        index1/index2 are their roster_index() results when already built.
         Returns: new_hires, resigned, title_changes, multiple_titles
         """
         new_hires = defaultdict(list)
@@ -65,82 +116,66 @@ class FacultyConverter:
         title_changes = {}
         multiple_titles = defaultdict(list)
 
-        # Create reverse lookup maps (name -> title)
-        title_map_1 = {}
-        title_map_2 = {}
+        for kind, name, detail in self.iter_changes(dict1, dict2, index1, index2):
+            if kind == 'title_change':
+                title_changes[name] = detail
+            elif kind == 'multiple_titles':
+                multiple_titles[name] = detail
+            elif kind == 'new_hire':
+                new_hires[detail].append(name)
+            else:
+                resigned[detail].append(name)
+
+        return dict(new_hires), dict(resigned), title_changes, multiple_titles
 
-        for title, names in dict1.items():
-            for name in names:
-                if name in title_map_1:
-                    if isinstance(title_map_1[name], list):
-                        title_map_1[name].append(title)
-                    else:
-                        title_map_1[name] = [title_map_1[name], title]
-                else:
-                    title_map_1[name] = title
+    def iter_changes(self, dict1, dict2, index1=None, index2=None):
+        """
+        compare_faculty as a generator: yields (kind, name, detail) as soon as
+        each change is known, so callers can stream results.
 
-        for title, names in dict2.items():
-            for name in names:
-                if name in title_map_2:
-                    if isinstance(title_map_2[name], list):
-                        title_map_2[name].append(title)
-                    else:
-                        title_map_2[name] = [title_map_2[name], title]
-                else:
-                    title_map_2[name] = title
+        kind is 'title_change' (detail: {'from', 'to'}), 'multiple_titles'
+        (detail: {'year1', 'year2'} lists), 'new_hire' or 'resigned' (detail:
+        title). Title changes come during the matching pass, new hires and
+        resignations after it.
+        """
+        # Reverse lookup maps (name -> title) and name sets
+        title_map_1, all_names_1 = index1 or self.roster_index(dict1)
+        title_map_2, all_names_2 = index2 or self.roster_index(dict2)
 
-        matched_map_2 = {}
         unmatched_names_2 = set(title_map_2.keys())
+        changed_names = set()
+        multiple_title_names = set()
 
         for name1 in title_map_1:
             match = self.match_name(name1, unmatched_names_2)
-            if match:
-                for name2 in unmatched_names_2:
-                    if name2.strip() == match:
-                        matched_map_2[name1] = name2
-                        unmatched_names_2.remove(name2)
-                        break
-            else:
-                matched_map_2[name1] = None
-
-        # Detect title changes
-        for name1, match_name2 in matched_map_2.items():
-            if match_name2:
-                title1 = title_map_1[name1]
-                title2 = title_map_2[match_name2]
-                if isinstance(title1, list) or isinstance(title2, list):
-                    multiple_titles[name1] = {
-                        "year1": title1 if isinstance(title1, list) else [title1],
-                        "year2": title2 if isinstance(title2, list) else [title2]
-                    }
-                elif title1 != title2:
-                    title_changes[name1] = {
-                        "from": title1,
-                        "to": title2
-                    }
-
-        changed_names = set(title_changes.keys())
-        multiple_title_names = set(multiple_titles.keys())
-
-        # Detect new hires and resignations
-        all_names_1 = set(name.strip() for names in dict1.values() for name in names)
-        all_names_2 = set(name.strip() for names in dict2.values() for name in names)
-
-        # Find new hires
-        for title, names in dict2.items():
-            for name in names:
-                match = self.match_name(name, all_names_1)
-                if not match:
-                    new_hires[title].append(name)
-
-        # Find resignations
-        for title, names in dict1.items():
-            for name in names:
-                matched_name = self.match_name(name, all_names_2)
-                if not matched_name and name not in changed_names and name not in multiple_title_names:
-                    resigned[title].append(name)
-
-        # Detect unusual patterns and filter
+            if not match:
+                continue
+            match_name2 = None
+            for name2 in unmatched_names_2:
+                if name2.strip() == match:
+                    match_name2 = name2
+                    unmatched_names_2.remove(name2)
+                    break
+            if not match_name2:
+                continue
+
+            # Detect title changes
+            title1 = title_map_1[name1]
+            title2 = title_map_2[match_name2]
+            if isinstance(title1, list) or isinstance(title2, list):
+                multiple_title_names.add(name1)
+                yield 'multiple_titles', name1, {
+                    "year1": title1 if isinstance(title1, list) else [title1],
+                    "year2": title2 if isinstance(title2, list) else [title2]
+                }
+            elif title1 != title2:
+                changed_names.add(name1)
+                yield 'title_change', name1, {
+                    "from": title1,
+                    "to": title2
+                }
+
+        # Names with near-duplicates across the years are neither hires nor resignations
         unusual_patterns = self.find_unusual_patterns(dict1, dict2)
         unusual_names = set()
         for name, matches in unusual_patterns.items():
@@ -148,13 +183,19 @@ class FacultyConverter:
             for match in matches:
                 unusual_names.add(match)
 
-        def filter_names(name_list):
-            return [name for name in name_list if name not in unusual_names]
-
-        new_hires = {title: filter_names(names) for title, names in new_hires.items() if filter_names(names)}
-        resigned = {title: filter_names(names) for title, names in resigned.items() if filter_names(names)}
+        # Find new hires
+        for title, names in dict2.items():
+            for name in names:
+                if name not in unusual_names and not self.match_name(name, all_names_1):
+                    yield 'new_hire', name, title
 
-        return new_hires, resigned, title_changes, multiple_titles
+        # Find resignations
+        for title, names in dict1.items():
+            for name in names:
+                if name in unusual_names or name in changed_names or name in multiple_title_names:
+                    continue
+                if not self.match_name(name, all_names_2):
+                    yield 'resigned', name, title
 
 
 class ExcelUpdater:
@@ -166,68 +207,295 @@ class ExcelUpdater:
         return change_string.split('->')[-1].strip() if '->' in change_string else change_string.strip()
 
     @staticmethod
-    def update_excel(excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict):
+    def inputs_from_comparison(new_hires, resigned, title_changes):
+        """
+        Flatten FacultyConverter.compare_faculty results into update_excel inputs.
+
+        Returns:
+            (list, dict, dict): resigned_list, title_changes_dict, new_hires_dict
+        """
+        resigned_list = [name for names in resigned.values() for name in names]
+        title_changes_dict = {name: f"{change['from']} -> {change['to']}" for name, change in title_changes.items()}
+        new_hires_dict = {name: title for title, names in new_hires.items() for name in names}
+        return resigned_list, title_changes_dict, new_hires_dict
+
+    @staticmethod
+    def load_sheet(excel_path, year_column, schema=None):
+        """
+        Read Sheet1 of a workbook and check its required columns.
+
+        The header row is validated first (see excel_io.preflight), so a
+        workbook with missing columns fails before the sheet is loaded. An
+        aliased name column is renamed to 'Faculty name'. A year_column of
+        None skips the year column check. A schema the caller already got
+        from preflight is used as is, without reading the header again.
+
+        Returns:
+            (DataFrame, str): The sheet, or None and an error message
+        """
+        if schema is None:
+            schema, error = excel_io.preflight(excel_path, year_column, sheet_name='Sheet1')
+            if schema is None:
+                return None, error
+
+        df = excel_io.read_excel(excel_path, sheet_name=schema['sheet'])
+
+        if df.empty:
+            return None, "Excel file is empty or could not be read properly."
+
+        return df.rename(columns={schema['name_column']: 'Faculty name'}), None
+
+    @staticmethod
+    def rollover(df, new_columns, source_column=None):
+        """
+        Add new academic-year columns seeded from the previous year.
+
+        The new columns are inserted after the source column and start as a
+        copy of it; blank cells carry forward the most recent value of any
+        earlier year column (one row-wise forward fill over the year columns).
+        Columns that already exist are left alone, so repeating a rollover
+        changes nothing.
+
+        Args:
+            df (DataFrame): Workbook sheet
+            new_columns (list): Year columns to add, in order (e.g. ['2025-2026'])
+            source_column (str): Column to seed from (default: latest year column)
+
+        Returns:
+            DataFrame: A copy of df with the new columns
+        """
+        import pandas as pd
+        new_columns = [col for col in dict.fromkeys(new_columns) if col not in df.columns]
+        if not new_columns:
+            return df.copy()
+
+        years = year_columns(df)
+        source_column = source_column or (years[-1] if years else None)
+        if source_column not in df.columns:
+            raise ValueError(f"No year column to roll over from (got '{source_column}')")
+
+        earlier = years[:years.index(source_column) + 1] if source_column in years else [source_column]
+        seed = df[earlier].ffill(axis=1)[source_column]
+        position = df.columns.get_loc(source_column) + 1
+        seeded = pd.DataFrame({col: seed for col in new_columns}, index=df.index)
+        return pd.concat([df.iloc[:, :position], seeded, df.iloc[:, position:]], axis=1)
+
+    @staticmethod
+    @metrics.timed('fuzzy_match')
+    def resolve_names(df, resigned_list, title_changes_dict, new_hires_dict, cutoff=0.85):
+        """
+        Map input names that are not in the sheet to the sheet's own spelling.
+
+        Builds one NameIndex over 'Faculty name' and looks up every unmatched
+        resignation, title change and hire, so an initials-style name from the
+        rosters updates the existing row instead of becoming a new hire.
+
+        Returns:
+            (list, dict, dict, list): The three inputs with resolved names, and
+                (input name, Match) for every fuzzy resolution
+        """
+        names = df['Faculty name']
+        known = set(names.dropna())
+        index = NameIndex(names.drop_duplicates(), cutoff=cutoff)
+        resolved = {}
+        for name in [*resigned_list, *title_changes_dict, *new_hires_dict]:
+            if name in known or name in resolved:
+                continue
+            match = index.lookup(name)
+            if match is not None:
+                resolved[name] = match
+
+        rename = {name: match.name for name, match in resolved.items()}
+        return ([rename.get(name, name) for name in resigned_list],
+                {rename.get(name, name): change for name, change in title_changes_dict.items()},
+                {rename.get(name, name): title for name, title in new_hires_dict.items()},
+                list(resolved.items()))
+
+    @staticmethod
+    @metrics.timed('exact_join')
+    def plan_changes(df, year_column, resigned_list, title_changes_dict, new_hires_dict):
+        """
+        Compute the change plan for a workbook sheet without modifying it.
+
+        Resignations take precedence over title changes. New hires already in
+        the sheet update their first matching row; the others are appended.
+
+        Returns:
+            DataFrame: action, name, row, old, new (see change_plan.make_plan;
+                matched_as/score are left for annotate_matches)
+        """
+        import pandas as pd
+        names = df['Faculty name']
+        current = df[year_column]
+        named = names.notna()
+
+        resigned_mask = named & names.isin(list(resigned_list))
+        title_mask = named & ~resigned_mask & names.isin(list(title_changes_dict))
+        new_titles = names[title_mask].map(
+            {name: ExcelUpdater.parse_title_change(change) for name, change in title_changes_dict.items()})
+
+        edits = pd.concat([
+            pd.DataFrame({'action': change_plan.RESIGNED, 'name': names[resigned_mask],
+                          'row': df.index[resigned_mask], 'old': current[resigned_mask], 'new': 'N'}),
+            pd.DataFrame({'action': change_plan.TITLE_CHANGE, 'name': names[title_mask],
+                          'row': df.index[title_mask], 'old': current[title_mask], 'new': new_titles}),
+        ]).sort_values('row', kind='stable')
+
+        # Values after the first pass, so hire updates report what they overwrite
+        after = current.copy()
+        after[edits['row'].to_numpy()] = edits['new'].to_numpy()
+
+        first_rows = names[named].drop_duplicates()
+        name_to_row = dict(zip(first_rows, first_rows.index))
+        existing = [name for name in new_hires_dict if name in name_to_row]
+        fresh = [name for name in new_hires_dict if name not in name_to_row]
+        existing_rows = [name_to_row[name] for name in existing]
+
+        updates = pd.DataFrame({'action': change_plan.UPDATED, 'name': existing, 'row': existing_rows,
+                                'old': after[existing_rows].to_numpy(),
+                                'new': [new_hires_dict[name] for name in existing]})
+        hires = pd.DataFrame({'action': change_plan.NEW_HIRE, 'name': fresh,
+                              'row': range(len(df), len(df) + len(fresh)), 'old': None,
+                              'new': [new_hires_dict[name] for name in fresh]})
+
+        records = pd.concat([edits, updates, hires], ignore_index=True)
+        return change_plan.make_plan(records.to_dict(orient='records'))
+
+    @staticmethod
+    def apply_plan(df, plan, year_column, default_department='Engineering'):
+        """Return a copy of df with every change of the plan applied"""
+        import pandas as pd
+        df = df.copy()
+
+        edits = plan[plan['action'] != change_plan.NEW_HIRE].drop_duplicates('row', keep='last')
+        if not edits.empty:
+            df.loc[edits['row'].astype('int64').to_numpy(), year_column] = edits['new'].astype(object).to_numpy()
+
+        hires = plan[plan['action'] == change_plan.NEW_HIRE]
+        if not hires.empty:
+            columns = list(df.columns) + ([] if 'Department' in df.columns else ['Department'])
+            new_rows = pd.DataFrame('N', index=range(len(hires)), columns=columns)
+            new_rows['Faculty name'] = hires['name'].astype(object).to_numpy()
+            new_rows['Department'] = default_department
+            new_rows[year_column] = hires['new'].astype(object).to_numpy()
+            df = pd.concat([df, new_rows], ignore_index=True)
+
+        return df
+
+    @staticmethod
+    def plan_excel(excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict, fuzzy_cutoff=0.85,
+                   rollover=None, schema=None):
+        """
+        Dry run of update_excel: compute the change plan, write nothing.
+
+        Returns:
+            (bool, str, DataFrame, list): Success, message, change plan, and
+                (input name, Match) for every fuzzy name resolution
+        """
+        try:
+            df, error = ExcelUpdater.load_sheet(excel_path, None if year_column in (rollover or ()) else year_column,
+                                                schema)
+            if df is None:
+                return False, error, change_plan.make_plan(), []
+            if rollover:
+                df = ExcelUpdater.rollover(df, rollover)
+
+            matches = []
+            if fuzzy_cutoff:
+                resigned_list, title_changes_dict, new_hires_dict, matches = ExcelUpdater.resolve_names(
+                    df, resigned_list, title_changes_dict, new_hires_dict, fuzzy_cutoff)
+
+            plan = ExcelUpdater.plan_changes(df, year_column, resigned_list, title_changes_dict, new_hires_dict)
+            plan = change_plan.annotate_matches(plan, matches)
+            return True, f"Dry run: {len(plan)} changes planned", plan, matches
+
+        except Exception as e:
+            return False, f"Error processing file: {e}", change_plan.make_plan(), []
+
+    @staticmethod
+    def output_path_for(excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict, output_name=None,
+                        output_format='xlsx', fuzzy_cutoff=0.85, rollover=None, write_mode='frame', highlight=True):
+        """
+        Content-addressed output path: '<name>_updated_<year>_<digest><suffix>',
+        where the digest covers the workbook bytes and every input that changes
+        the written file (including the write mode, since 'patch' keeps the
+        workbook's formatting, the format and highlighting). xlsx outputs keep
+        the workbook's own suffix.
+        """
+        p = Path(excel_path)
+        digest = excel_io.inputs_digest(
+            files=[excel_path],
+            params=[year_column, list(resigned_list), list(title_changes_dict.items()), list(new_hires_dict.items()),
+                    fuzzy_cutoff, write_mode, output_format, highlight] + ([list(rollover)] if rollover else []),
+        )
+        stem = output_name or p.stem
+        suffix = p.suffix if output_format == 'xlsx' else excel_io.OUTPUT_FORMATS[output_format]
+        return p.parent / f"{stem}_updated_{year_column.replace('-', '_')}_{digest}{suffix}"
+
+    @staticmethod
+    def update_excel(excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict, output_name=None,
+                     write_mode='frame', output_format='xlsx', fuzzy_cutoff=0.85, rollover=None, highlight=True,
+                     schema=None):
         """
         Update Excel with faculty resignations, promotions, and new hires.
 
+        The result is written atomically under a content-addressed name, so
+        concurrent updates never clash and repeating identical inputs returns
+        the existing output without rewriting it (the change list is still
+        computed, which is cheap next to the write).
+
         Args:
             excel_path (str): Path to Excel file
             year_column (str): The year column to update
             resigned_list (list): Faculty names who resigned
             title_changes_dict (dict): name -> "old -> new" or just "new"
             new_hires_dict (dict): name -> full title
+            output_name (str): Base name for the output file (default: workbook name)
+            write_mode (str): 'frame', 'stream' (constant-memory writer) or 'patch' (keeps the
+                workbook's formatting), see excel_io.write_excel
+            output_format (str): 'xlsx', 'csv' or 'parquet'; csv/parquet skip Excel serialization
+            fuzzy_cutoff (float): Similarity for resolving names missing from the sheet
+                (see resolve_names); None matches exact names only
+            rollover (list): New year columns to add before the changes are applied
+                (see rollover); year_column may be one of them
+            highlight (bool): Colour the changed cells of xlsx outputs, one
+                conditional-format rule per action (see change_plan.plan_highlights)
+            schema (dict): excel_io.preflight result for Sheet1 when the caller has
+                already validated the header (see load_sheet)
 
         Returns:
-            (bool, str, list, str): Success, message, list of changes, output_path
+            (bool, str, list, str): Success, message, list of changes (fuzzy
+                name resolutions first), output_path
         """
         try:
-            df = pd.read_excel(excel_path, sheet_name='Sheet1')
-
-            if df.empty:
-                return False, "Excel file is empty or could not be read properly.", [], None
-
-            if 'Faculty name' not in df.columns or year_column not in df.columns:
-                missing = 'Faculty name' if 'Faculty name' not in df.columns else year_column
-                return False, f"Error: '{missing}' column not found.", [], None
-
-            changes = []
-
-            # Process resignations and title changes
-            for idx, row in df.iterrows():
-                name = row['Faculty name']
-                if pd.isna(name):
-                    continue
-
-                current_value = row[year_column]
-
-                if name in resigned_list:
-                    df.at[idx, year_column] = 'N'
-                    changes.append(f"RESIGNED: {name}: {current_value} → N")
-                elif name in title_changes_dict:
-                    new_title = ExcelUpdater.parse_title_change(title_changes_dict[name])
-                    df.at[idx, year_column] = new_title
-                    changes.append(f"TITLE CHANGE: {name}: {current_value} → {new_title}")
-
-            # Add/update new hires
-            for name, full_title in new_hires_dict.items():
-                found = df[df['Faculty name'] == name]
-                if not found.empty:
-                    idx = found.index[0]
-                    old = df.at[idx, year_column]
-                    df.at[idx, year_column] = full_title
-                    changes.append(f"UPDATED: {name}: {old} → {full_title}")
-                else:
-                    new_row = {'Faculty name': name, 'Department': 'Engineering', year_column: full_title}
-                    for col in df.columns:
-                        if col not in ('Faculty name', 'Department', year_column):
-                            new_row[col] = 'N'
-                    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                    changes.append(f"NEW HIRE: {name} as {full_title}")
+            output_path = ExcelUpdater.output_path_for(
+                excel_path, year_column, resigned_list, title_changes_dict, new_hires_dict, output_name, output_format,
+                fuzzy_cutoff, rollover, write_mode, highlight
+            )
+            df, error = ExcelUpdater.load_sheet(excel_path, None if year_column in (rollover or ()) else year_column,
+                                                schema)
+            if df is None:
+                return False, error, [], None
+            if rollover:
+                df = ExcelUpdater.rollover(df, rollover)
+
+            matches = []
+            if fuzzy_cutoff:
+                resigned_list, title_changes_dict, new_hires_dict, matches = ExcelUpdater.resolve_names(
+                    df, resigned_list, title_changes_dict, new_hires_dict, fuzzy_cutoff)
+
+            plan = change_plan.annotate_matches(
+                ExcelUpdater.plan_changes(df, year_column, resigned_list, title_changes_dict, new_hires_dict), matches)
+            changes = [describe_match(name, match) for name, match in matches] + change_plan.describe_plan(plan)
+            if output_path.exists():
+                return True, "File already up to date for these inputs", changes, str(output_path)
+
+            df = ExcelUpdater.apply_plan(df, plan, year_column)
 
             # Save file
-            p = Path(excel_path)
-            output_path = p.parent / f"{p.stem}_updated_{year_column.replace('-', '_')}{p.suffix}"
-            df.to_excel(output_path, index=False)
+            highlights = change_plan.plan_highlights(plan, df.columns, year_column) if highlight else None
+            excel_io.write_atomic(output_path, lambda tmp_path: excel_io.write_table(
+                tmp_path, df, output_format, write_mode, source=excel_path, highlights=highlights))
 
             return True, f"File updated successfully", changes, str(output_path)
 
@@ -235,26 +503,49 @@ class ExcelUpdater:
             return False, f"Error processing file: {e}", [], None
 
     @staticmethod
-    def create_base_template(output_path, year_columns=None):
+    def base_template(year_columns=None):
         """
-        Create a base Excel template for faculty data.
+        Base template sheet for faculty data.
 
         Args:
-            output_path (str): Path to save the template
             year_columns (list): List of year columns (e.g., ['2018-2019', '2019-2020'])
         """
+        import pandas as pd
         if year_columns is None:
             year_columns = ['2023-2024', '2024-2025']
 
-        columns = ['Faculty name', 'Department'] + year_columns
-        df = pd.DataFrame(columns=columns)
-
         # Add sample data
         sample_data = [
             {'Faculty name': 'Sample Professor', 'Department': 'Engineering',
              year_columns[0]: 'Professor', year_columns[-1]: 'Professor'},
         ]
-        df = pd.DataFrame(sample_data)
+        return pd.DataFrame(sample_data)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def template_bytes(year_columns=('2023-2024', '2024-2025')):
+        """
+        The base template as .xlsx bytes, generated in memory.
+
+        Cached (LRU) per tuple of year columns, so repeat requests cost no
+        DataFrame build, Excel serialization or disk I/O.
+        """
+        buffer = BytesIO()
+        with metrics.span('excel_write'):
+            ExcelUpdater.base_template(list(year_columns)).to_excel(buffer, index=False)
+        return buffer.getvalue()
+
+    @staticmethod
+    def create_base_template(output_path, year_columns=None):
+        """
+        Create a base Excel template for faculty data.
+
+        Args:
+            output_path (str): Path to save the template
+            year_columns (list): List of year columns (e.g., ['2018-2019', '2019-2020'])
+        """
+        if year_columns is None:
+            year_columns = ['2023-2024', '2024-2025']
 
-        df.to_excel(output_path, index=False)
+        Path(output_path).write_bytes(ExcelUpdater.template_bytes(tuple(year_columns)))
         return True, f"Template created at {output_path}"
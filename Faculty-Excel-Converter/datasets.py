@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Dataset Store Module
+Rosters uploaded once and referred to by ID afterwards. A dataset ID is the
+SHA-256 of the roster file, its parsed form is kept in an in-memory LRU with
+a byte budget, and the raw file is kept in SQLite so any worker process (or
+this one after an eviction) can rebuild it.
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import metrics
+from converter import FacultyConverter
+from result_cache import local_connection
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+# faculty: title -> names as parsed, index: (title map, names) from FacultyConverter.roster_index,
+# size: approximate bytes held in memory
+Dataset = namedtuple('Dataset', ['id', 'faculty', 'index', 'size'])
+
+
+def dataset_id(content):
+    """Dataset ID of a roster file's bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _footprint(faculty, index):
+    """Rough memory use of a parsed roster and its index"""
+    title_map, names = index
+    size = sys.getsizeof(faculty) + sys.getsizeof(title_map) + sys.getsizeof(names)
+    for title, members in faculty.items():
+        size += sys.getsizeof(title) + sys.getsizeof(members) + sum(sys.getsizeof(name) for name in members)
+    return size + sum(sys.getsizeof(name) for name in names)
+
+
+class DatasetStore:
+    """
+    Parsed rosters by dataset ID.
+
+    add() parses a roster once; get() returns it from memory, or re-parses
+    the stored file on a miss. Memory is bounded by budget_bytes (least
+    recently used datasets are dropped first), storage by ttl. Memory hits
+    still refresh last_used in the database (at most every TOUCH_INTERVAL
+    seconds), so a dataset one worker keeps using does not expire for the
+    others.
+    """
+
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path, budget_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600):
+        """
+        Args:
+            path: SQLite database file holding the raw rosters
+            budget_bytes (int): Memory allowed for parsed datasets in this process
+            ttl (float): Seconds an unused dataset is kept in the database
+        """
+        self.path = str(path)
+        self.budget_bytes = budget_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._touched = {}  # dataset ID -> when this process last wrote its last_used
+        self._converter = FacultyConverter()
+
+    def _connection(self):
+        return local_connection(self._local, self.path, SCHEMA)
+
+    def parse(self, content, key=None):
+        """Parse a roster into a Dataset without storing it"""
+        key = key or dataset_id(content)
+        faculty = self._converter.parse_txt_to_dict(content)
+        index = FacultyConverter.roster_index(faculty)
+        return Dataset(key, faculty, index, _footprint(faculty, index))
+
+    def _remember(self, dataset):
+        with self._lock:
+            if dataset.id in self._memory:
+                self._memory.move_to_end(dataset.id)
+                return
+            self._memory[dataset.id] = dataset
+            self._memory_bytes += dataset.size
+            self._touched[dataset.id] = time.time()  # add() and the miss path have just written last_used
+            # Keep at least the newest dataset even if it alone exceeds the budget
+            while self._memory_bytes > self.budget_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size
+                self._touched.pop(evicted.id, None)
+
+    def add(self, content):
+        """
+        Parse and store a roster.
+
+        Args:
+            content (bytes): The roster file
+
+        Returns:
+            Dataset: Parsed dataset (the same ID for the same file)
+        """
+        key = dataset_id(content)
+        dataset = self.parse(content, key)
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM datasets WHERE last_used < ?", (now - self.ttl,))
+        conn.execute("INSERT OR REPLACE INTO datasets (id, content, created, last_used) VALUES (?, ?, ?, ?)",
+                     (key, content, now, now))
+        self._remember(dataset)
+        return dataset
+
+    def get(self, key):
+        """Dataset by ID, or None when it was never added or has expired"""
+        now = time.time()
+        touch = False
+        with self._lock:
+            dataset = self._memory.get(key)
+            if dataset is not None:
+                self._memory.move_to_end(key)
+                touch = now - self._touched.get(key, 0) >= self.TOUCH_INTERVAL
+                if touch:
+                    self._touched[key] = now
+        metrics.cache_lookup('dataset', dataset is not None)
+        if dataset is not None:
+            if touch:
+                self._connection().execute("UPDATE datasets SET last_used = ? WHERE id = ?", (now, key))
+            return dataset
+
+        conn = self._connection()
+        row = conn.execute("SELECT content FROM datasets WHERE id = ? AND last_used >= ?",
+                           (key, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE datasets SET last_used = ? WHERE id = ?", (time.time(), key))
+        dataset = self.parse(bytes(row[0]), key)
+        self._remember(dataset)
+        return dataset
+
+    @property
+    def memory_bytes(self):
+        """Approximate bytes of parsed datasets held in memory"""
+        return self._memory_bytes
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+Excel I/O Module
+Pluggable reader backends and output writers for faculty workbooks
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import change_plan
+import metrics
+
+
+def _pandas_has_calamine():
+    """pandas ships a calamine engine from 2.2 onwards"""
+    import pandas as pd
+    major, minor = (int(part) for part in pd.__version__.split('.')[:2])
+    return (major, minor) >= (2, 2)
+
+
+class OpenpyxlReader:
+    """Pure-Python reader, always available through pandas"""
+
+    name = 'openpyxl'
+
+    def sheet_names(self, excel_path):
+        import pandas as pd
+        with pd.ExcelFile(excel_path, engine='openpyxl') as xl_file:
+            return xl_file.sheet_names
+
+    def read_sheet(self, excel_path, sheet_name=0):
+        import pandas as pd
+        return pd.read_excel(excel_path, sheet_name=sheet_name, engine='openpyxl')
+
+    def read_sheets(self, excel_path):
+        import pandas as pd
+        return pd.read_excel(excel_path, sheet_name=None, engine='openpyxl')
+
+
+class CalamineReader:
+    """Compiled (Rust) reader provided by the optional python-calamine package"""
+
+    name = 'calamine'
+
+    def sheet_names(self, excel_path):
+        from python_calamine import CalamineWorkbook
+        return CalamineWorkbook.from_path(str(excel_path)).sheet_names
+
+    def read_sheet(self, excel_path, sheet_name=0):
+        import pandas as pd
+        if _pandas_has_calamine():
+            return pd.read_excel(excel_path, sheet_name=sheet_name, engine='calamine')
+
+        # Older pandas: build the frame from the raw rows ourselves
+        from python_calamine import CalamineWorkbook
+        workbook = CalamineWorkbook.from_path(str(excel_path))
+        if isinstance(sheet_name, int):
+            sheet = workbook.get_sheet_by_index(sheet_name)
+        else:
+            sheet = workbook.get_sheet_by_name(sheet_name)
+
+        rows = sheet.to_python()
+        while rows and all(cell == '' for cell in rows[-1]):
+            rows.pop()
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        return df.replace('', float('nan')).infer_objects()
+
+    def read_sheets(self, excel_path):
+        import pandas as pd
+        if _pandas_has_calamine():
+            return pd.read_excel(excel_path, sheet_name=None, engine='calamine')
+        return {name: self.read_sheet(excel_path, name) for name in self.sheet_names(excel_path)}
+
+
+# Fastest first; the first installed backend wins
+READERS = {
+    'calamine': (CalamineReader, 'python_calamine'),
+    'openpyxl': (OpenpyxlReader, 'openpyxl'),
+}
+
+
+def available_readers():
+    """Names of the reader backends whose packages are installed"""
+    return [name for name, (_, module) in READERS.items()
+            if importlib.util.find_spec(module) is not None]
+
+
+def get_reader(name=None):
+    """
+    Return a reader backend instance.
+
+    Args:
+        name (str): Backend name ('calamine' or 'openpyxl'). When omitted the
+            fastest installed backend is picked automatically.
+    """
+    if name is None:
+        installed = available_readers()
+        if not installed:
+            raise ImportError("No Excel reader available. Install openpyxl or python-calamine.")
+        name = installed[0]
+
+    if name not in READERS:
+        raise ValueError(f"Unknown Excel reader '{name}'. Choose from: {', '.join(READERS)}")
+    reader_class, _ = READERS[name]
+    return reader_class()
+
+
+def sheet_names(excel_path, reader=None):
+    """List the sheet names of a workbook"""
+    return get_reader(reader).sheet_names(excel_path)
+
+
+@metrics.timed('excel_read')
+def read_excel(excel_path, sheet_name=0, reader=None):
+    """Read one sheet of a workbook into a DataFrame using the selected backend"""
+    return get_reader(reader).read_sheet(excel_path, sheet_name)
+
+
+@metrics.timed('excel_read')
+def read_workbook(excel_path, reader=None):
+    """Read every sheet of a workbook in one pass: {sheet name: DataFrame} in workbook order"""
+    return get_reader(reader).read_sheets(excel_path)
+
+
+# Accepted spellings of the faculty name column, preferred first
+NAME_COLUMN_ALIASES = ['Faculty name', 'Faculty Name', 'Name', 'faculty name', 'faculty_name']
+
+
+def find_name_column(columns, name_aliases=None):
+    """The faculty name column among columns (first matching alias), or None"""
+    return next((alias for alias in (name_aliases or NAME_COLUMN_ALIASES) if alias in columns), None)
+
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _xlsx_sheet_paths(archive):
+    """Sheet name -> worksheet part path inside an .xlsx archive, in workbook order"""
+    from xml.etree import ElementTree
+
+    targets = {rel.get('Id'): rel.get('Target')
+               for rel in ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels')).iter(f'{_PKG_REL_NS}Relationship')}
+    paths = {}
+    for sheet in ElementTree.fromstring(archive.read('xl/workbook.xml')).iter(f'{_MAIN_NS}sheet'):
+        target = targets[sheet.get(f'{_REL_NS}id')]
+        paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    return paths
+
+
+def _xlsx_shared_strings(archive, wanted):
+    """Shared strings at the wanted indices; stops parsing after the last one"""
+    from xml.etree import ElementTree
+
+    strings, last = {}, max(wanted, default=-1)
+    if last < 0 or 'xl/sharedStrings.xml' not in archive.namelist():
+        return strings
+    with archive.open('xl/sharedStrings.xml') as part:
+        index = 0
+        for _, element in ElementTree.iterparse(part):
+            if element.tag != f'{_MAIN_NS}si':
+                continue
+            if index in wanted:
+                strings[index] = ''.join(text.text or '' for text in element.iter(f'{_MAIN_NS}t'))
+            if index == last:
+                break
+            index += 1
+            element.clear()
+    return strings
+
+
+def _xlsx_cell_value(cell, shared):
+    kind, value = cell.get('t'), cell.findtext(f'{_MAIN_NS}v')
+    if kind == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(f'{_MAIN_NS}t'))
+    if value is None:
+        return None
+    if kind == 's':
+        return shared.get(int(value))
+    if kind == 'b':
+        return value == '1'
+    if kind in ('str', 'e'):
+        return value
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def read_header(excel_path, sheet_name=None):
+    """
+    Read only the header row of a sheet.
+
+    .xlsx files are streamed straight from the archive: parsing stops at the
+    end of the first row and the shared strings table is only read as far as
+    the header needs, so the cost does not grow with the number of rows.
+    Other formats fall back to a pandas read of zero rows. Like the pandas
+    header, only row 1 counts: if it is empty, so is the header (even when
+    a later row holds the names).
+
+    Args:
+        excel_path (str): Path to the workbook
+        sheet_name (str): Sheet to inspect; None means 'Sheet1' if present,
+            otherwise the first sheet
+
+    Returns:
+        (str, list, list): Resolved sheet name, header values, all sheet names
+
+    Raises:
+        KeyError: If the sheet does not exist
+    """
+    import zipfile
+    from xml.etree import ElementTree
+
+    try:
+        archive = zipfile.ZipFile(excel_path)
+    except zipfile.BadZipFile:
+        import pandas as pd
+        with pd.ExcelFile(excel_path) as xl_file:
+            names = xl_file.sheet_names
+            sheet_name = sheet_name or ('Sheet1' if 'Sheet1' in names else names[0])
+            if sheet_name not in names:
+                raise KeyError(f"Sheet '{sheet_name}' not found. Available sheets: {names}")
+            header = xl_file.parse(sheet_name, nrows=0).columns
+        return sheet_name, [col for col in header if not str(col).startswith('Unnamed: ')], names
+
+    with archive:
+        paths = _xlsx_sheet_paths(archive)
+        names = list(paths)
+        if sheet_name is None:
+            sheet_name = 'Sheet1' if 'Sheet1' in names else names[0]
+        if sheet_name not in paths:
+            raise KeyError(f"Sheet '{sheet_name}' not found. Available sheets: {names}")
+
+        cells = []
+        with archive.open(paths[sheet_name]) as part:
+            for _, element in ElementTree.iterparse(part):
+                if element.tag == f'{_MAIN_NS}c':
+                    cells.append(element)
+                elif element.tag == f'{_MAIN_NS}row':
+                    # Empty rows are not stored: a first row other than row 1 means no header
+                    if element.get('r', '1') != '1':
+                        cells = []
+                    break
+
+        shared = _xlsx_shared_strings(archive, {int(cell.findtext(f'{_MAIN_NS}v')) for cell in cells
+                                                if cell.get('t') == 's' and cell.findtext(f'{_MAIN_NS}v') is not None})
+        header = [_xlsx_cell_value(cell, shared) for cell in cells]
+
+    return sheet_name, [value for value in header if value is not None], names
+
+
+def preflight(excel_path, year_column, sheet_name=None, name_aliases=None):
+    """
+    Validate a workbook's schema from its header row before any full load.
+
+    Resolves the faculty name column through its aliases and checks that the
+    year column exists (skipped when year_column is None).
+
+    Returns:
+        (dict, str): {'sheet', 'name_column', 'columns'} and None, or None and
+            an error message listing the available columns
+    """
+    try:
+        sheet_name, header, _ = read_header(excel_path, sheet_name)
+    except KeyError as e:
+        return None, f"Error: {e.args[0]}"
+
+    columns = header
+    name_column = find_name_column(columns, name_aliases)
+    if name_column is None:
+        return None, f"Error: No faculty name column found. Expected 'Faculty name' or similar. Available columns: {columns}"
+    if year_column is not None and year_column not in columns:
+        return None, f"Error: '{year_column}' column not found. Available columns: {columns}"
+
+    return {'sheet': sheet_name, 'name_column': name_column, 'columns': columns}, None
+
+
+WRITE_MODES = ('frame', 'stream', 'patch')
+STREAM_CHUNK_ROWS = 10_000
+
+
+def _iter_chunks(data):
+    """A DataFrame or an iterable of DataFrame chunks -> DataFrame chunks of bounded size"""
+    import pandas as pd
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        for start in range(0, max(len(frame), 1), STREAM_CHUNK_ROWS):
+            yield frame.iloc[start:start + STREAM_CHUNK_ROWS]
+
+
+def _iter_rows(data):
+    """Header row followed by value rows, blanks as None; only one chunk is converted at a time"""
+    header_written = False
+    for chunk in _iter_chunks(data):
+        if not header_written:
+            yield list(chunk.columns)
+            header_written = True
+        yield from chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def _stream_xlsxwriter(output_path, sheets, highlights=None):
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(str(output_path), {'constant_memory': True})
+    try:
+        for sheet_name, data in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            for row_number, row in enumerate(_iter_rows(data)):
+                worksheet.write_row(row_number, 0, row)
+            if highlights and highlights.get(sheet_name):
+                _highlight_xlsxwriter(workbook, worksheet, highlights[sheet_name])
+    finally:
+        workbook.close()
+
+
+def _stream_openpyxl(output_path, sheets, highlights=None):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for sheet_name, data in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        for row in _iter_rows(data):
+            worksheet.append(row)
+        if highlights and highlights.get(sheet_name):
+            _highlight_openpyxl(worksheet, highlights[sheet_name])
+    workbook.save(str(output_path))
+
+
+def _patch_sheet(worksheet, data):
+    """
+    Write a DataFrame over an existing worksheet, keeping its formatting.
+
+    Sheet columns the DataFrame no longer has and rows beyond its length are
+    deleted. Columns missing from the sheet are inserted at their DataFrame
+    position and styled like their left neighbour; appended rows copy the
+    style of the last existing row. The sheet's own name column label (e.g.
+    an alias like 'Name' that the DataFrame calls 'Faculty name') and blank
+    header cells are kept. Only cells whose value changes are touched.
+    """
+    from copy import copy
+
+    import pandas as pd
+    from openpyxl.utils import get_column_letter
+
+    df = data if isinstance(data, pd.DataFrame) else pd.concat(list(data), ignore_index=True)
+    # Blank header cells are read by pandas as 'Unnamed: <position>'
+    cells = next(worksheet.iter_rows(max_row=1), ())
+    header = [f"Unnamed: {position}" if cell.value is None else cell.value for position, cell in enumerate(cells)]
+    blank = {column for column, cell in zip(header, cells) if cell.value is None}
+    name_column = find_name_column(header)
+    if name_column is not None and name_column not in df.columns and 'Faculty name' in df.columns:
+        df = df.rename(columns={'Faculty name': name_column})
+
+    # Right to left, so the positions still to check do not shift
+    for position in range(len(header), 0, -1):
+        if header[position - 1] not in df.columns:
+            worksheet.delete_cols(position)
+            del header[position - 1]
+
+    last_row = worksheet.max_row
+    for position, column in enumerate(df.columns, start=1):
+        if position <= len(header) and header[position - 1] == column:
+            continue
+        worksheet.insert_cols(position)
+        header.insert(position - 1, column)
+        if position > 1:
+            source_letter, target_letter = get_column_letter(position - 1), get_column_letter(position)
+            for row in range(1, last_row + 1):
+                source = worksheet.cell(row, position - 1)
+                if source.has_style:
+                    worksheet.cell(row, position)._style = copy(source._style)
+            if source_letter in worksheet.column_dimensions:
+                worksheet.column_dimensions[target_letter].width = worksheet.column_dimensions[source_letter].width
+
+    labels = [None if column in blank else column for column in df.columns]
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    for row_number, values in enumerate([labels, *rows], start=1):
+        for column_number, value in enumerate(values, start=1):
+            cell = worksheet.cell(row_number, column_number)
+            if row_number > last_row and last_row > 1:
+                template = worksheet.cell(last_row, column_number)
+                if template.has_style:
+                    cell._style = copy(template._style)
+            if cell.value != value:
+                cell.value = value
+
+    if worksheet.max_row > len(df) + 1:
+        worksheet.delete_rows(len(df) + 2, worksheet.max_row - len(df) - 1)
+
+
+def _patch_openpyxl(source_path, output_path, sheets, highlights=None):
+    from openpyxl import load_workbook
+    workbook = load_workbook(source_path)
+    for sheet_name, data in sheets:
+        worksheet = workbook[sheet_name] if sheet_name in workbook.sheetnames else workbook.create_sheet(sheet_name)
+        _patch_sheet(worksheet, data)
+        if highlights is not None:
+            _clear_highlights_openpyxl(worksheet)
+        if highlights and highlights.get(sheet_name):
+            _highlight_openpyxl(worksheet, highlights[sheet_name])
+    workbook.save(str(output_path))
+
+
+def _range_refs(ranges):
+    """0-based data-row (first_row, first_col, last_row, last_col) tuples -> 'A2:A5 C9' (row 1 is the header)"""
+    from openpyxl.utils import get_column_letter
+
+    refs = []
+    for first_row, first_col, last_row, last_col in ranges:
+        first = f"{get_column_letter(first_col + 1)}{first_row + 2}"
+        last = f"{get_column_letter(last_col + 1)}{last_row + 2}"
+        refs.append(first if first == last else f"{first}:{last}")
+    return ' '.join(refs)
+
+
+def _highlight_openpyxl(worksheet, highlights):
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import PatternFill
+
+    for color, ranges in highlights.items():
+        fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+        worksheet.conditional_formatting.add(_range_refs(ranges), FormulaRule(formula=['TRUE'], fill=fill))
+
+
+def _clear_highlights_openpyxl(worksheet):
+    """Drop highlight rules of an earlier run (always-true rules with a change_plan fill), so they do not stack"""
+    from openpyxl.formatting.formatting import ConditionalFormattingList
+
+    colors = set(change_plan.HIGHLIGHT_COLORS.values())
+    kept = ConditionalFormattingList()
+    for formatting in worksheet.conditional_formatting:
+        for rule in formatting.rules:
+            fill = rule.dxf.fill if rule.dxf is not None else None
+            color = fill.fgColor.rgb if fill is not None and isinstance(fill.fgColor.rgb, str) else ''
+            if not (rule.formula == ['TRUE'] and color[-6:] in colors):
+                kept.add(str(formatting.sqref), rule)
+    worksheet.conditional_formatting = kept
+
+
+def _highlight_xlsxwriter(workbook, worksheet, highlights):
+    for color, ranges in highlights.items():
+        first_row, first_col, last_row, last_col = ranges[0]
+        worksheet.conditional_format(first_row + 1, first_col, last_row + 1, last_col, {
+            'type': 'formula', 'criteria': 'TRUE', 'format': workbook.add_format({'bg_color': f'#{color}'}),
+            'multi_range': _range_refs(ranges),
+        })
+
+
+@metrics.timed('excel_write')
+def write_excel(output_path, sheets, mode='frame', source=None, highlights=None):
+    """
+    Write one or more sheets to an .xlsx file.
+
+    Args:
+        output_path (str): Destination path
+        sheets: A DataFrame (written as Sheet1), or a list of
+            (sheet_name, data) where data is a DataFrame or an iterable of
+            DataFrame chunks
+        mode (str): 'frame' uses DataFrame.to_excel, which builds the whole
+            workbook object model in memory. 'stream' pushes rows through a
+            constant-memory writer (xlsxwriter when installed, otherwise
+            openpyxl's write-only mode), so peak memory no longer grows with
+            the number of rows. 'patch' writes the sheets over a copy of the
+            source workbook, keeping its formatting, column widths and any
+            sheets not listed
+        source (str): Original workbook, required by 'patch'
+        highlights (dict): sheet name -> {fill colour: [(first_row,
+            first_col, last_row, last_col), ...]} of 0-based data cells to
+            highlight (see change_plan.plan_highlights). Each colour becomes a
+            single conditional-format rule over all of its ranges instead of
+            per-cell styles, so the cost barely grows with the number of cells
+    """
+    import pandas as pd
+    if mode not in WRITE_MODES:
+        raise ValueError(f"Unknown write mode '{mode}'. Choose from: {', '.join(WRITE_MODES)}")
+    if isinstance(sheets, pd.DataFrame):
+        sheets = [('Sheet1', sheets)]
+
+    if mode == 'patch':
+        if source is None:
+            raise ValueError("Write mode 'patch' needs the source workbook")
+        _patch_openpyxl(source, output_path, sheets, highlights)
+        return
+
+    if mode == 'stream':
+        if importlib.util.find_spec('xlsxwriter') is not None:
+            _stream_xlsxwriter(output_path, sheets, highlights)
+        else:
+            _stream_openpyxl(output_path, sheets, highlights)
+        return
+
+    with pd.ExcelWriter(output_path) as writer:
+        for sheet_name, data in sheets:
+            df = data if isinstance(data, pd.DataFrame) else pd.concat(list(data), ignore_index=True)
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            if highlights and highlights.get(sheet_name):
+                if writer.engine == 'xlsxwriter':
+                    _highlight_xlsxwriter(writer.book, writer.sheets[sheet_name], highlights[sheet_name])
+                else:
+                    _highlight_openpyxl(writer.sheets[sheet_name], highlights[sheet_name])
+
+
+# Output format -> file suffix. Only xlsx goes through an Excel writer.
+OUTPUT_FORMATS = {'xlsx': '.xlsx', 'csv': '.csv', 'parquet': '.parquet'}
+
+
+def write_table(output_path, df, output_format='xlsx', write_mode='frame', source=None, sheet_name='Sheet1',
+                highlights=None):
+    """
+    Write a single sheet in the requested output format.
+
+    csv and parquet skip Excel serialization entirely; parquet needs the
+    optional pyarrow (or fastparquet) package. source and sheet_name are
+    used by the 'patch' write mode, highlights ({colour: ranges}) by xlsx
+    outputs only (see write_excel).
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+
+    if output_format == 'csv':
+        with metrics.span('serialize'):
+            df.to_csv(output_path, index=False)
+    elif output_format == 'parquet':
+        # Year columns mix titles with blanks; store everything but numbers as text
+        with metrics.span('serialize'):
+            df.astype({col: 'string' for col in df.columns if df[col].dtype == object}).to_parquet(output_path,
+                                                                                                    index=False)
+    else:
+        write_excel(output_path, [(sheet_name, df)], mode=write_mode, source=source,
+                    highlights=None if highlights is None else {sheet_name: highlights})
+
+
+def inputs_digest(files=(), params=None, length=16):
+    """
+    Short SHA-256 hex digest identifying a set of inputs.
+
+    Args:
+        files (list): Paths whose contents are hashed
+        params: Any JSON-serializable value (order-sensitive), e.g. the year
+            column and change lists
+        length (int): Number of hex characters to keep
+    """
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(json.dumps(params, default=str, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:length]
+
+
+# Read once at import: os.umask can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomic(output_path, write):
+    """
+    Write a file via a temp file in the same directory and rename it into place.
+
+    Readers never see a half-written file and concurrent writers of the same
+    path cannot interleave; the last rename wins. The file gets the usual
+    permissions for the umask (mkstemp alone would leave it owner-only).
+
+    Args:
+        output_path (str): Final path
+        write (callable): Called with the temp path (same suffix) to write to
+
+    Returns:
+        str: output_path
+    """
+    output_path = Path(output_path)
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f'.{output_path.stem}.', suffix=output_path.suffix)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return str(output_path)
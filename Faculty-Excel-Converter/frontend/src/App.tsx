@@ -3,10 +3,7 @@ import { ThreeDBackground } from "./components/ThreeDBackground";
 import { Upload, FileText, Download, Sparkles } from "lucide-react";
 
 interface AnalysisResults {
-  resigned: Array<{ name: string; title: string }>;
-  title_changes: Array<{ name: string; from: string; to: string }>;
-  new_hires: Array<{ name: string; title: string }>;
-  multiple_titles: Array<{ name: string; year1: string; year2: string }>;
+  result_id: string;
   summary: {
     resignations: number;
     new_hires: number;
@@ -15,6 +12,23 @@ interface AnalysisResults {
   };
 }
 
+// Lists shown under the summary, fetched a page at a time from /results/<result_id>
+type ResultCategory = "new_hires" | "resigned" | "title_changes";
+
+interface ResultPage {
+  items: Array<{ name: string; title?: string; from?: string; to?: string }>;
+  next_cursor: number | null;
+}
+
+const PAGE_SIZE = 100;
+
+// Summary count that tells whether a category has anything to fetch
+const CATEGORY_COUNTS: Record<ResultCategory, keyof AnalysisResults["summary"]> = {
+  new_hires: "new_hires",
+  resigned: "resignations",
+  title_changes: "title_changes",
+};
+
 const API_BASE_URL = (import.meta.env.VITE_API_BASE_URL || "").replace(/\/$/, "");
 
 export default function App() {
@@ -32,6 +46,7 @@ export default function App() {
   const [yearColumn, setYearColumn] = useState("");
   const [yearColumns, setYearColumns] = useState("");
   const [results, setResults] = useState<AnalysisResults | null>(null);
+  const [pages, setPages] = useState<Partial<Record<ResultCategory, ResultPage>>>({});
   const [loading, setLoading] = useState(false);
 
   const handleAnalyze = async (e: React.FormEvent) => {
@@ -42,6 +57,8 @@ export default function App() {
     const formData = new FormData();
     formData.append("file1", file1);
     formData.append("file2", file2);
+    // Only the counts and a result ID come back; the lists are paged in below
+    formData.append("paged", "true");
 
     try {
       const response = await fetch(buildApiUrl("/analyze"), {
@@ -49,7 +66,15 @@ export default function App() {
         body: formData,
       });
       const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data.error);
+      }
       setResults(data);
+      setPages({});
+      const categories = (Object.keys(CATEGORY_COUNTS) as ResultCategory[]).filter(
+        (category) => data.summary[CATEGORY_COUNTS[category]] > 0
+      );
+      await Promise.all(categories.map((category) => loadPage(data.result_id, category)));
     } catch (error) {
       console.error("Error:", error);
       alert("Error analyzing files");
@@ -58,6 +83,44 @@ export default function App() {
     }
   };
 
+  const loadPage = async (resultId: string, category: ResultCategory, cursor = 0) => {
+    const params = new URLSearchParams({ category, cursor: String(cursor), limit: String(PAGE_SIZE) });
+    const response = await fetch(buildApiUrl(`/results/${resultId}?${params}`));
+    if (!response.ok) {
+      throw new Error(`Error loading ${category}`);
+    }
+    const data: ResultPage = await response.json();
+    setPages((previous) => ({
+      ...previous,
+      [category]: {
+        items: [...(cursor ? previous[category]?.items ?? [] : []), ...data.items],
+        next_cursor: data.next_cursor,
+      },
+    }));
+  };
+
+  const handleLoadMore = async (category: ResultCategory) => {
+    const cursor = pages[category]?.next_cursor;
+    if (!results || cursor == null) return;
+    try {
+      await loadPage(results.result_id, category, cursor);
+    } catch (error) {
+      console.error("Error:", error);
+      alert("Error loading more results");
+    }
+  };
+
+  const loadMoreButton = (category: ResultCategory) =>
+    pages[category]?.next_cursor != null && (
+      <button
+        type="button"
+        onClick={() => handleLoadMore(category)}
+        className="mt-4 px-4 py-2 rounded-lg bg-pink-500/20 border border-pink-400/30 text-pink-200 hover:bg-pink-500/30 transition-all duration-300"
+      >
+        Load more
+      </button>
+    );
+
   const handleUpdateExcel = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!excelFile || !file1 || !file2 || !yearColumn) return;
@@ -393,42 +456,45 @@ export default function App() {
                   </div>
 
                   {/* Detailed Results */}
-                  {results.new_hires.length > 0 && (
+                  {(pages.new_hires?.items.length ?? 0) > 0 && (
                     <div className="bg-pink-900/30 rounded-xl p-6 border border-pink-500/20">
                       <h4 className="text-xl font-semibold text-green-400 mb-3">New Hires</h4>
                       <ul className="space-y-2">
-                        {results.new_hires.map((hire, idx) => (
+                        {pages.new_hires!.items.map((hire, idx) => (
                           <li key={idx} className="text-pink-200">
                             <span className="font-medium">{hire.name}</span> - {hire.title}
                           </li>
                         ))}
                       </ul>
+                      {loadMoreButton("new_hires")}
                     </div>
                   )}
 
-                  {results.resigned.length > 0 && (
+                  {(pages.resigned?.items.length ?? 0) > 0 && (
                     <div className="bg-pink-900/30 rounded-xl p-6 border border-pink-500/20">
                       <h4 className="text-xl font-semibold text-red-400 mb-3">Resignations</h4>
                       <ul className="space-y-2">
-                        {results.resigned.map((person, idx) => (
+                        {pages.resigned!.items.map((person, idx) => (
                           <li key={idx} className="text-pink-200">
                             <span className="font-medium">{person.name}</span> - {person.title}
                           </li>
                         ))}
                       </ul>
+                      {loadMoreButton("resigned")}
                     </div>
                   )}
 
-                  {results.title_changes.length > 0 && (
+                  {(pages.title_changes?.items.length ?? 0) > 0 && (
                     <div className="bg-pink-900/30 rounded-xl p-6 border border-pink-500/20">
                       <h4 className="text-xl font-semibold text-blue-400 mb-3">Title Changes</h4>
                       <ul className="space-y-2">
-                        {results.title_changes.map((change, idx) => (
+                        {pages.title_changes!.items.map((change, idx) => (
                           <li key={idx} className="text-pink-200">
                             <span className="font-medium">{change.name}</span>: {change.from} → {change.to}
                           </li>
                         ))}
                       </ul>
+                      {loadMoreButton("title_changes")}
                     </div>
                   )}
                 </div>
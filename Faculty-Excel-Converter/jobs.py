@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Job Queue Module
+Runs long requests (workbook updates) on a local thread pool and tracks them
+in a SQLite file, so any worker process can answer status polls. No external
+broker is needed.
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import local_connection
+
+# Seconds between prunes triggered by status polls (submit always prunes)
+PRUNE_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+class JobQueue:
+    """
+    Background jobs with polling.
+
+    A job is a function returning a JSON-serializable dict. It runs in this
+    process's pool while its status (queued -> running -> done | failed) and
+    result are stored in the shared database. If the result has an
+    'output_path', that file is deleted together with the job once it expires,
+    unless a job that has not expired refers to the same file (outputs are
+    content-addressed, so identical updates share one). A job still queued or
+    running after timeout seconds is marked failed: the process running it
+    has died (restart, deploy, out of memory) and it will never finish.
+    """
+
+    def __init__(self, path, max_workers=2, ttl=24 * 3600, timeout=3600):
+        """
+        Args:
+            path: SQLite database file shared by all worker processes
+            max_workers (int): Jobs run at the same time in this process
+            ttl (float): Seconds a finished job (and its output file) is kept
+            timeout (float): Seconds a job may stay queued or running before it is marked failed
+        """
+        self.path = str(path)
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.timeout = timeout
+        self._pruned = 0
+        self._local = threading.local()
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        return local_connection(self._local, self.path, SCHEMA)
+
+    def _pool(self):
+        # Threads do not survive a fork: each worker process starts its own pool
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _set(self, job_id, status, result=None, error=None):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, updated = ?, result = ?, error = ? WHERE id = ?",
+            (status, time.time(), None if result is None else json.dumps(result), error, job_id))
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._set(job_id, 'running')
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self._set(job_id, 'failed', error=str(e))
+        else:
+            self._set(job_id, 'done', result=result)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return its job ID at once.
+
+        Returns:
+            str: Job ID for get()
+        """
+        self.prune()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute("INSERT INTO jobs (id, status, created, updated) VALUES (?, 'queued', ?, ?)",
+                                   (job_id, now, now))
+        self._pool().submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Polls also prune (at most every PRUNE_INTERVAL seconds), so an idle
+        server still expires old jobs and fails stale ones.
+
+        Returns:
+            dict or None: id, status, created, updated, result (dict or None)
+                and error (str or None); None for an unknown or expired job
+        """
+        if time.time() - self._pruned >= PRUNE_INTERVAL:
+            self.prune()
+        else:
+            self._fail_stale(job_id)
+        row = self._connection().execute(
+            "SELECT id, status, created, updated, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'status', 'created', 'updated', 'result', 'error'), row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def _fail_stale(self, job_id=None):
+        """Mark queued or running jobs (all, or just job_id) failed once they are older than timeout"""
+        now = time.time()
+        query = ("UPDATE jobs SET status = 'failed', updated = ?, error = ? "
+                 "WHERE status IN ('queued', 'running') AND updated < ?")
+        params = (now, f"Job did not finish within {self.timeout:g} seconds (its worker may have stopped)",
+                  now - self.timeout)
+        if job_id is not None:
+            query, params = query + " AND id = ?", params + (job_id,)
+        self._connection().execute(query, params)
+
+    def prune(self):
+        """
+        Fail stale jobs, then delete jobs that finished more than ttl seconds
+        ago, with the output files no other job uses.
+        """
+        self._pruned = time.time()
+        self._fail_stale()
+        conn = self._connection()
+        cutoff = time.time() - self.ttl
+        expired = conn.execute("SELECT id, result FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+                               (cutoff,)).fetchall()
+        if not expired:
+            return
+        for job_id, _ in expired:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+        in_use = {json.loads(result).get('output_path')
+                  for (result,) in conn.execute("SELECT result FROM jobs WHERE result IS NOT NULL")}
+        for _, result in expired:
+            output_path = json.loads(result).get('output_path') if result else None
+            if output_path and output_path not in in_use:
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
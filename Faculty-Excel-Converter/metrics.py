@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+Counters and latency histograms in the Prometheus text format, without
+extra dependencies.
+
+Updates are a dict lookup and a few additions under a lock, so metrics can
+stay on in hot paths. Under gunicorn every worker has its own registry; set
+METRICS_DIR to a directory shared by the workers and each one writes its
+values there (at most once a second), so /metrics on any worker reports
+the sum over all of them.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; covers a cached lookup (~50us) up to a large workbook update
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+FLUSH_INTERVAL = 1.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Add amount for the given label values (in labelnames order)"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(labels): value for labels, value in self._values.items()}
+
+    @staticmethod
+    def merge(total, values):
+        return total + values
+
+    def lines(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_label_text(self.labelnames, json.loads(key))} {_number(value)}"
+
+
+class Histogram:
+    """Observation counts per bucket, plus their sum and count, per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Record one value (e.g. seconds) for the given label values"""
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][slot] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(labels): [list(counts), total, count] for labels, (counts, total, count)
+                    in self._values.items()}
+
+    @staticmethod
+    def merge(total, values):
+        return [[a + b for a, b in zip(total[0], values[0])], total[1] + values[1], total[2] + values[2]]
+
+    def lines(self, values):
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = json.loads(key)
+            cumulative = 0
+            for bound, bucket_count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _number(bound)
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    """The metrics of one process, and their text rendering"""
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory: Directory shared by worker processes, or None for this process only
+        """
+        self.directory = directory
+        self._metrics = {}
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        """{metric name: {label values as JSON: value}}"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def flush(self, force=False):
+        """Write this process's snapshot to the shared directory (at most once per FLUSH_INTERVAL)"""
+        now = time.monotonic()
+        if not self.directory or (not force and now - self._last_flush < FLUSH_INTERVAL):
+            return
+        self._last_flush = now
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+
+    def _collected(self):
+        """Snapshots of every worker (just this process without a shared directory)"""
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    with open(entry.path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # a worker is rewriting it; its values show up on the next scrape
+        return snapshots
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        snapshots = self._collected()
+        lines = []
+        for name, metric in self._metrics.items():
+            values = {}
+            for snapshot in snapshots:
+                for key, value in snapshot.get(name, {}).items():
+                    values[key] = metric.merge(values[key], value) if key in values else value
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines(values))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry(os.environ.get('METRICS_DIR') or None)
+
+REQUESTS = REGISTRY.register(Counter(
+    'faculty_http_requests_total', 'HTTP requests by route, method and status', ['route', 'method', 'status']))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'faculty_http_request_duration_seconds', 'Time to build the response, by route', ['route']))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'faculty_stage_duration_seconds',
+    'Time in internal stages (upload_read, parse, compare, exact_join, fuzzy_match, unusual_scan, excel_read, '
+    'excel_write, serialize, response_build)',
+    ['stage']))
+FUZZY_COMPARISONS = REGISTRY.register(Counter(
+    'faculty_fuzzy_comparisons_total', 'Name pairs scored by fuzzy matching', ['matcher']))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'faculty_cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result']))
+
+
+# Span durations of the request being handled ({name: seconds}), None outside one
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class Span:
+    """
+    Timing span: observes the with-block's duration in STAGE_SECONDS and
+    adds it to the current request's Server-Timing breakdown, if any.
+    """
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def span(name):
+    """Context manager timing one internal stage (see Span)"""
+    return Span(name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as a span"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_request_timings():
+    """Start collecting spans for the current request; returns the token for end_request_timings"""
+    return _request_timings.set({})
+
+
+def end_request_timings(token):
+    _request_timings.reset(token)
+
+
+def server_timing(total=None):
+    """
+    Server-Timing header value for the current request: one entry per span
+    name with its summed duration in ms (repeated and nested spans included),
+    plus 'total' when given (seconds).
+    """
+    timings = dict(_request_timings.get() or {})
+    if total is not None:
+        timings['total'] = total
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def cache_lookup(cache, hit):
+    """Count one cache lookup"""
+    CACHE_REQUESTS.inc(cache, 'hit' if hit else 'miss')
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Name Index Module
+Fuzzy lookup of faculty names against a workbook's name column
+"""
+
+import re
+from collections import Counter, defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+import metrics
+
+# label: index label of the matched name, name: the name as stored, score: similarity (0-1)
+Match = namedtuple('Match', ['label', 'name', 'score'])
+
+
+def name_tokens(name):
+    """Lowercase word tokens of a name, punctuation dropped ('P. K. Imbrie' -> ['p', 'k', 'imbrie'])"""
+    return re.sub(r'[^\w\s]', ' ', str(name)).lower().split()
+
+
+def initials_compatible(tokens_a, tokens_b):
+    """
+    True if two token lists name the same person up to initials:
+    same surname, and every other token equal or an initial of its counterpart
+    ('j smith' / 'john smith', 'p k imbrie' / 'peter k imbrie').
+    """
+    if len(tokens_a) != len(tokens_b) or not tokens_a or tokens_a[-1] != tokens_b[-1]:
+        return False
+    return all(a == b or (min(len(a), len(b)) == 1 and a[0] == b[0])
+               for a, b in zip(tokens_a[:-1], tokens_b[:-1]))
+
+
+def initials_conflict(tokens_a, tokens_b):
+    """True if aligned tokens of two equally long names have different initials ('robert i samuels' / 'robert j samuels')"""
+    return len(tokens_a) == len(tokens_b) and any(
+        min(len(a), len(b)) == 1 and a[0] != b[0] for a, b in zip(tokens_a, tokens_b))
+
+
+def surname_conflict(tokens_a, tokens_b):
+    """True if two equally long names end in different full surnames ('hayriye ayhan' / 'hayriye ayran')"""
+    return (len(tokens_a) == len(tokens_b) and min(len(tokens_a[-1]), len(tokens_b[-1])) > 1
+            and tokens_a[-1] != tokens_b[-1])
+
+
+class NameIndex:
+    """
+    Fuzzy index over a fixed set of names.
+
+    Built once per sheet: a trigram inverted index plus a (surname, first
+    initial) bucket narrow each lookup to a handful of candidates, which are
+    then scored with difflib. A lookup therefore touches only the names that
+    share n-grams or a surname with the query, not the whole column.
+    """
+
+    MAX_POSTINGS = 1000
+
+    def __init__(self, names, cutoff=0.85, max_candidates=10):
+        """
+        Args:
+            names: Series (labels are its index) or iterable of names (labels
+                are positions); missing and non-string values are ignored
+            cutoff (float): Minimum similarity for a match
+            max_candidates (int): Candidates scored per lookup from the n-gram index
+        """
+        items = names.items() if hasattr(names, 'items') else enumerate(names)
+        self.cutoff = cutoff
+        self.max_candidates = max_candidates
+        self._entries = []
+        self._grams = defaultdict(list)
+        self._buckets = defaultdict(list)
+
+        for label, name in items:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            tokens = name_tokens(name)
+            if not tokens:
+                continue
+            entry = len(self._entries)
+            key = ' '.join(tokens)
+            self._entries.append((label, name, key, tokens))
+            for gram in set(self._ngrams(key)):
+                self._grams[gram].append(entry)
+            self._buckets[(tokens[-1], tokens[0][0])].append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _ngrams(key, n=3):
+        padded = f"  {key} "
+        return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+    def candidates(self, name):
+        """
+        Entry numbers worth scoring for a query name.
+
+        Prefix filtering: a name within the cutoff differs in only a few
+        n-grams, so it must share at least one of the query's rarest n-grams.
+        Only those postings are read, and postings longer than
+        MAX_POSTINGS are skipped, so the work per lookup is bounded no
+        matter how long the column is (the surname bucket still catches
+        initials).
+        """
+        tokens = name_tokens(name)
+        if not tokens:
+            return []
+        grams = sorted(set(self._ngrams(' '.join(tokens))), key=lambda gram: len(self._grams.get(gram, ())))
+        prefix = max(4, int(len(grams) * (1 - self.cutoff) * 3) + 1)
+        shared = Counter()
+        for gram in grams[:prefix]:
+            postings = self._grams.get(gram, ())
+            if len(postings) <= self.MAX_POSTINGS:
+                shared.update(postings)
+        # A single shared rare n-gram is chance; near-duplicates share several
+        found = [entry for entry, count in shared.most_common(self.max_candidates) if count > 1]
+        found += [entry for entry in self._buckets.get((tokens[-1], tokens[0][0]), ()) if entry not in found]
+        return found
+
+    def matches(self, name):
+        """
+        Every indexed name that reaches the cutoff, best first.
+
+        Initial-compatible names ('J. Smith' for 'John Smith') count as a
+        match at the cutoff even when their plain similarity is lower; names
+        with different initials in the same position, or with the same
+        number of words but different surnames, never match.
+        """
+        tokens = name_tokens(name)
+        # difflib caches its analysis of the second sequence: set the query once, vary the candidate
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(' '.join(tokens))
+        scored = []
+        candidates = self.candidates(name)
+        metrics.FUZZY_COMPARISONS.inc('name_index', amount=len(candidates))
+        for entry in candidates:
+            label, stored, stored_key, stored_tokens = self._entries[entry]
+            if initials_conflict(tokens, stored_tokens) or surname_conflict(tokens, stored_tokens):
+                continue
+            matcher.set_seq1(stored_key)
+            score = 0.0
+            if matcher.real_quick_ratio() >= self.cutoff and matcher.quick_ratio() >= self.cutoff:
+                score = matcher.ratio()
+            if score < self.cutoff and initials_compatible(tokens, stored_tokens):
+                score = self.cutoff
+            if score >= self.cutoff:
+                scored.append(Match(label, stored, score))
+        scored.sort(key=lambda match: match.score, reverse=True)
+        return scored
+
+    def lookup(self, name):
+        """
+        Best match for a name, or None when nothing reaches the cutoff or
+        two different names tie for the best score.
+        """
+        scored = self.matches(name)
+        if not scored:
+            return None
+        best = scored[0]
+        if any(match.score == best.score and name_tokens(match.name) != name_tokens(best.name) for match in scored[1:]):
+            return None
+        return best
+
+
+def describe_match(query, match):
+    """Human-readable line for one fuzzy resolution"""
+    return f"FUZZY MATCH: {query} → {match.name} ({match.score:.2f})"
+
+
+def describe_skipped_match(query, match, reason):
+    """Human-readable line for a fuzzy resolution that was found but not applied"""
+    return f"FUZZY MATCH SKIPPED: {query} → {match.name} ({match.score:.2f}): {reason}"
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Result Cache Module
+SQLite-backed cache of serialized responses, keyed by a content hash of the
+inputs. One database file is shared by every worker process, entries expire
+after a TTL and the least recently used ones are evicted past a size limit.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def content_key(*contents, **settings):
+    """
+    SHA-256 key over input contents (in order) and settings.
+
+    Args:
+        *contents: bytes or str of each input, e.g. the two uploaded rosters
+        **settings: anything else the result depends on (e.g. cutoff=0.85)
+
+    Returns:
+        str: Hex digest
+    """
+    return digest_key(*(hashlib.sha256(content.encode('utf-8') if isinstance(content, str) else bytes(content))
+                        .hexdigest() for content in contents), **settings)
+
+
+def digest_key(*digests, **settings):
+    """
+    content_key from the inputs' SHA-256 hex digests instead of their contents
+    (e.g. dataset IDs), so the same files give the same key either way.
+    """
+    digest = hashlib.sha256()
+    for hex_digest in digests:
+        # Hash each input separately so ('ab', 'c') and ('a', 'bc') differ
+        digest.update(bytes.fromhex(hex_digest))
+    for name, value in sorted(settings.items()):
+        digest.update(f"{name}={value!r};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def local_connection(local, path, schema):
+    """
+    SQLite connection for the calling thread, opened on first use.
+
+    Connections are kept per thread and per process (a forked gunicorn
+    worker opens its own), in WAL mode so workers can read while another
+    one writes.
+
+    Args:
+        local: threading.local holding the connection
+        path: Database file (its directory is created if needed)
+        schema (str): CREATE TABLE IF NOT EXISTS statement run on connect
+    """
+    conn = getattr(local, 'conn', None)
+    if conn is None or local.pid != os.getpid():
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(schema)
+        local.conn, local.pid = conn, os.getpid()
+    return conn
+
+
+class ResultCache:
+    """
+    Key -> text cache in a SQLite file.
+
+    Connections are opened lazily (see local_connection), so the cache can be
+    created at import time and still be used safely after gunicorn forks.
+    """
+
+    def __init__(self, path, ttl=3600, max_entries=256):
+        """
+        Args:
+            path: SQLite database file (its directory is created if needed)
+            ttl (float): Seconds an entry stays valid after it was stored
+            max_entries (int): Entries kept; least recently used ones are evicted first
+        """
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connection(self):
+        return local_connection(self._local, self.path, SCHEMA)
+
+    def get(self, key):
+        """Stored value for key, or None when missing or expired"""
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value FROM results WHERE key = ? AND created >= ?",
+                           (key, now - self.ttl)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def created(self, key):
+        """Time the live entry for key was stored, or None when missing or expired; marks it used"""
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT created FROM results WHERE key = ? AND created >= ?",
+                           (key, now - self.ttl)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, value):
+        """Store value under key, then drop expired and least recently used entries"""
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO results (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                         (key, value, now, now))
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+            conn.execute("DELETE FROM results WHERE key IN "
+                         "(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                         (self.max_entries,))
+
+    def clear(self):
+        """Remove every entry"""
+        self._connection().execute("DELETE FROM results")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Results Module
+Indexed view of a stored /analyze result for filtered, paginated reads.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+# Category names are the list keys of an /analyze response, in page order
+CATEGORIES = ('resigned', 'title_changes', 'new_hires', 'multiple_titles')
+
+
+def _record_titles(record):
+    """Every title a record mentions (its title, both sides of a change, or each listed title)"""
+    titles = [record.get('title'), record.get('from'), record.get('to')]
+    for field in ('year1', 'year2'):
+        if record.get(field):
+            titles += record[field].split(', ')
+    return {title for title in titles if title}
+
+
+class ResultIndex:
+    """
+    One /analyze result, sorted by (category, name) with lookups for filters.
+
+    Each category is a contiguous range of positions, a name prefix is a
+    sub-range found by bisection, and a title maps to its sorted positions,
+    so a page costs O(log n + page size) whatever the result size. Cursors
+    are positions in this order and stay valid because a result never changes.
+    """
+
+    def __init__(self, result):
+        """
+        Args:
+            result (dict): /analyze response with the CATEGORIES lists
+        """
+        self.records = []
+        self._keys = []
+        self._ranges = {}
+        self._titles = defaultdict(list)
+
+        for category in CATEGORIES:
+            start = len(self.records)
+            for record in sorted(result.get(category, []), key=lambda record: (record['name'].lower(), record['name'])):
+                position = len(self.records)
+                self.records.append({'category': category, **record})
+                self._keys.append(record['name'].lower())
+                for title in _record_titles(record):
+                    self._titles[title].append(position)
+            self._ranges[category] = (start, len(self.records))
+
+    def _spans(self, categories, name_prefix):
+        """(start, end) position ranges matching the category and name filters, in order"""
+        spans = []
+        for category in categories:
+            start, end = self._ranges[category]
+            if name_prefix:
+                prefix = name_prefix.lower()
+                start = bisect_left(self._keys, prefix, start, end)
+                # Every key with the prefix sorts below prefix + the highest code point
+                end = bisect_right(self._keys, prefix + '\U0010ffff', start, end)
+            if start < end:
+                spans.append((start, end))
+        return spans
+
+    def page(self, categories=None, title=None, name_prefix=None, cursor=0, limit=100):
+        """
+        One page of records.
+
+        Args:
+            categories: Iterable of CATEGORIES to include (all when empty)
+            title (str): Only records mentioning this title
+            name_prefix (str): Only names starting with this (case-insensitive)
+            cursor (int): Position to start from (next_cursor of the previous page)
+            limit (int): Records per page
+
+        Returns:
+            tuple: (records, total matching records, next cursor or None at the end)
+        """
+        spans = self._spans([c for c in CATEGORIES if not categories or c in categories], name_prefix)
+        positions = self._titles.get(title, []) if title else None
+
+        total = 0
+        items = []
+        next_cursor = None
+        for start, end in spans:
+            if positions is None:
+                total += end - start
+                chosen = range(max(start, cursor), end)
+            else:
+                lo, hi = bisect_left(positions, start), bisect_left(positions, end)
+                total += hi - lo
+                chosen = (positions[i] for i in range(max(lo, bisect_left(positions, cursor)), hi))
+            for position in chosen:
+                if len(items) == limit:
+                    if next_cursor is None:
+                        next_cursor = position
+                    break
+                items.append(self.records[position])
+        return items, total, next_cursor
@@ -36,6 +36,8 @@ fi
 echo "Building frontend..."
 npm run build
 cd ..
+echo "Pre-compressing frontend assets..."
+python compress_assets.py
 echo "Frontend build complete!"
 echo ""
 
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Workbook Analysis Module
+Columnar operations on faculty workbooks (one column per academic year)
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import excel_io
+from name_index import NameIndex, initials_compatible, name_tokens
+
+ABSENT = 'N'
+HIRE = 'hire'
+RESIGNATION = 'resignation'
+TITLE_CHANGE = 'title_change'
+YEAR_COLUMN = re.compile(r'\d{4}\s*-\s*\d{4}')
+
+
+def _normalize_titles(column):
+    """Strip titles and treat blanks/NaN as absent ('N')"""
+    values = column.astype('string').str.strip()
+    return values.fillna(ABSENT).replace('', ABSENT)
+
+
+def diff_year_columns(df, from_column, to_column, name_column='Faculty name'):
+    """
+    Compare two year columns of a workbook DataFrame.
+
+    Every row is classified at once with a single vectorized select:
+    'N' -> title is a hire, title -> 'N' a resignation and title -> other
+    title a title change. Unchanged rows are dropped.
+
+    Args:
+        df (DataFrame): Workbook sheet with one column per academic year
+        from_column (str): Earlier year column (e.g. '2023-2024')
+        to_column (str): Later year column (e.g. '2024-2025')
+        name_column (str): Column holding faculty names
+
+    Returns:
+        DataFrame: name, row, change, from, to (indexed like df)
+    """
+    import numpy as np
+    import pandas as pd
+    for column in (name_column, from_column, to_column):
+        if column not in df.columns:
+            raise KeyError(f"'{column}' column not found. Available columns: {list(df.columns)}")
+
+    old = _normalize_titles(df[from_column]).to_numpy()
+    new = _normalize_titles(df[to_column]).to_numpy()
+    was_absent = old == ABSENT
+    is_absent = new == ABSENT
+
+    change = np.select(
+        [was_absent & ~is_absent, ~was_absent & is_absent, ~was_absent & ~is_absent & (old != new)],
+        [HIRE, RESIGNATION, TITLE_CHANGE],
+        default='',
+    )
+
+    diff = pd.DataFrame({
+        'name': df[name_column].to_numpy(),
+        'row': df.index.to_numpy(),
+        'change': change,
+        'from': old,
+        'to': new,
+    }, index=df.index)
+    return diff[(diff['change'] != '') & diff['name'].notna()]
+
+
+def diff_workbook_years(excel_path, from_column, to_column, sheet_name='Sheet1', reader=None):
+    """Read a workbook sheet and diff two of its year columns"""
+    df = excel_io.read_excel(excel_path, sheet_name=sheet_name, reader=reader)
+    return diff_year_columns(df, from_column, to_column)
+
+
+def diff_to_changes(diff):
+    """
+    Convert a year-column diff into the dicts produced by
+    FacultyConverter.compare_faculty: new_hires, resigned, title_changes.
+    """
+    hires = diff[diff['change'] == HIRE]
+    resigns = diff[diff['change'] == RESIGNATION]
+    moves = diff[diff['change'] == TITLE_CHANGE]
+
+    new_hires = hires.groupby('to', sort=True)['name'].agg(list).to_dict()
+    resigned = resigns.groupby('from', sort=True)['name'].agg(list).to_dict()
+    title_changes = {name: {'from': old, 'to': new}
+                     for name, old, new in zip(moves['name'], moves['from'], moves['to'])}
+    return new_hires, resigned, title_changes
+
+
+def year_columns(df):
+    """Columns that look like academic years, e.g. '2023-2024' or '1999-2001'"""
+    return [col for col in df.columns if isinstance(col, str) and YEAR_COLUMN.fullmatch(col.strip())]
+
+
+def rosters_by_year(df, columns=None, name_column='Faculty name'):
+    """
+    Build the 'Title: Name1, Name2' roster text for many year columns at once.
+
+    The year columns are melted into one long frame, absent ('N') entries are
+    dropped, and names are joined per (year, title) group in a single groupby.
+
+    Returns:
+        dict: year column -> roster text in the format parse_txt_to_dict reads
+    """
+    columns = year_columns(df) if columns is None else list(columns)
+    missing = [col for col in [name_column] + columns if col not in df.columns]
+    if missing:
+        raise KeyError(f"Columns not found: {missing}. Available columns: {list(df.columns)}")
+
+    long = df[[name_column] + columns].melt(id_vars=name_column, var_name='year', value_name='title')
+    long['title'] = _normalize_titles(long['title'])
+    long[name_column] = long[name_column].astype('string').str.strip()
+    long = long[(long['title'] != ABSENT) & long[name_column].notna() & (long[name_column] != '')]
+
+    lines = (long.groupby(['year', 'title'], sort=True)[name_column].agg(', '.join)
+             .reset_index(name='names'))
+    lines['line'] = lines['title'] + ': ' + lines['names']
+    rosters = lines.groupby('year', sort=False)['line'].agg('\n'.join).to_dict()
+    return {col: rosters.get(col, '') + '\n' for col in columns}
+
+
+def export_rosters(excel_path, output_dir=None, columns=None, sheet_name='Sheet1', reader=None):
+    """
+    Export year columns of a workbook as roster text files.
+
+    Files are named '<workbook stem>_<year>.txt' and written next to the
+    workbook unless output_dir is given.
+
+    Returns:
+        list: Paths of the written files
+    """
+    excel_path = Path(excel_path)
+    output_dir = Path(output_dir) if output_dir else excel_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    df = excel_io.read_excel(excel_path, sheet_name=sheet_name, reader=reader)
+    written = []
+    for year, text in rosters_by_year(df, columns).items():
+        out_path = output_dir / f"{excel_path.stem}_{year.replace('-', '_')}.txt"
+        out_path.write_text(text)
+        written.append(str(out_path))
+    return written
+
+
+def duplicate_groups(df, name_column='Faculty name', cutoff=0.85):
+    """
+    Label the rows of a sheet that name the same person.
+
+    Names are normalized (case, punctuation, spacing) and hashed into
+    buckets, so exact duplicates share a bucket without any comparison. One
+    NameIndex lookup per bucket then links near-duplicates ('J. Smith' /
+    'John Smith'); the index only scores candidates that share n-grams or a
+    surname, so the pass stays near-linear instead of comparing every pair.
+    A similar name is only linked when it is also initials-compatible (see
+    name_index.initials_compatible), so 'Joseph L. A. Hughes' and 'Joseph
+    Blake Hughes' stay apart however close their spelling.
+
+    Returns:
+        ndarray: Group number per row (the position of the group's first
+            row); rows without a name form their own group
+    """
+    import pandas as pd
+    names = df[name_column].reset_index(drop=True)
+    keys = names.map(lambda name: ' '.join(name_tokens(name)) if isinstance(name, str) else None)
+    bucket_first = keys.dropna().drop_duplicates()
+    parent = {position: position for position in bucket_first.index}
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    index = NameIndex(names[bucket_first.index], cutoff=cutoff)
+    for position in bucket_first.index:
+        tokens = keys[position].split()
+        for match in index.matches(names[position]):
+            if not initials_compatible(tokens, keys[match.label].split()):
+                continue
+            root, other = find(position), find(match.label)
+            if root != other:
+                parent[max(root, other)] = min(root, other)
+
+    first_of_key = pd.Series(bucket_first.index, index=bucket_first.to_numpy())
+    groups = keys.map(first_of_key).map(lambda position: find(position) if pd.notna(position) else None)
+    return groups.fillna(pd.Series(names.index, index=names.index)).astype('int64').to_numpy()
+
+
+def merge_duplicate_rows(df, groups, name_column='Faculty name'):
+    """
+    Collapse each group of duplicate rows into its first row.
+
+    Year columns are combined for all groups at once: a title from any row
+    of the group wins over 'N', and 'N' wins over a blank. Other columns
+    keep their first non-blank value.
+
+    Returns:
+        (DataFrame, DataFrame): Merged sheet, and one row per merged group
+            with the kept name, the merged names and the number of rows
+    """
+    import pandas as pd
+    groups = pd.Series(groups, index=df.index)
+    years = year_columns(df)
+
+    stripped = df[years].astype('string').apply(lambda column: column.str.strip())
+    absent = stripped.eq(ABSENT).fillna(False)
+    titles = df[years].where(~absent & stripped.ne('').fillna(False))
+    merged_years = (titles.groupby(groups, sort=False).first()
+                    .combine_first(df[years].where(absent).groupby(groups, sort=False).first()))
+    others = df.drop(columns=years).groupby(groups, sort=False).first()
+    merged = others.join(merged_years)[list(df.columns)].reset_index(drop=True)
+
+    sizes = groups.map(groups.value_counts())
+    duplicated = df.loc[(sizes > 1).to_numpy(), name_column].groupby(groups[sizes > 1], sort=False)
+    report = pd.DataFrame({
+        'kept': duplicated.first(),
+        'merged': duplicated.agg(lambda names: list(names)[1:]),
+        'rows': duplicated.size(),
+    }).reset_index(drop=True)
+    return merged, report
+
+
+def dedupe_workbook(excel_path, sheet_name='Sheet1', cutoff=0.85, reader=None):
+    """Read one sheet and merge its duplicate rows (see merge_duplicate_rows)"""
+    df = excel_io.read_excel(excel_path, sheet_name=sheet_name, reader=reader)
+    return merge_duplicate_rows(df, duplicate_groups(df, cutoff=cutoff))
+
+
+def run(args):
+    """Run one parsed CLI command"""
+    if args.command == 'dedupe':
+        merged, report = dedupe_workbook(args.excel_path, args.sheet, args.cutoff)
+        print(f"{len(report)} duplicate groups, {int(report['rows'].sum()) - len(report)} rows to merge")
+        for record in report.itertuples(index=False):
+            print(f"  {record.kept} <- {', '.join(map(str, record.merged))}")
+        if args.output:
+            excel_io.write_atomic(args.output, lambda tmp_path: excel_io.write_excel(tmp_path, [(args.sheet, merged)]))
+            print(f"Merged sheet saved to {args.output}")
+        return
+
+    if args.command == 'export':
+        columns = [y.strip() for y in args.years.split(',') if y.strip()] if args.years else None
+        total = 0
+        for workbook in args.workbooks:
+            written = export_rosters(workbook, args.output_dir, columns, args.sheet)
+            total += len(written)
+            print(f"{workbook}: {len(written)} roster files")
+        print(f"Exported {total} roster files")
+        return
+
+    diff = diff_workbook_years(args.excel_path, args.from_column, args.to_column, args.sheet)
+    counts = diff['change'].value_counts()
+    print(f"{args.from_column} -> {args.to_column}: "
+          f"{counts.get(HIRE, 0)} hires, {counts.get(RESIGNATION, 0)} resignations, "
+          f"{counts.get(TITLE_CHANGE, 0)} title changes")
+    for record in diff.itertuples(index=False):
+        print(f"  {record.change.upper():<12} {record.name}: {record[3]} → {record.to}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work directly on faculty workbooks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff_cmd = commands.add_parser('diff', help="Diff two year columns of a workbook")
+    diff_cmd.add_argument('excel_path')
+    diff_cmd.add_argument('from_column', help="Earlier year column, e.g. 2023-2024")
+    diff_cmd.add_argument('to_column', help="Later year column, e.g. 2024-2025")
+    diff_cmd.add_argument('--sheet', default='Sheet1')
+
+    export_cmd = commands.add_parser('export', help="Export year columns as 'Title: names' roster files")
+    export_cmd.add_argument('workbooks', nargs='+', help="Workbooks to export")
+    export_cmd.add_argument('--years', help="Comma-separated year columns (default: every year column)")
+    export_cmd.add_argument('--output-dir', help="Directory for the roster files (default: next to each workbook)")
+    export_cmd.add_argument('--sheet', default='Sheet1')
+
+    dedupe_cmd = commands.add_parser('dedupe', help="Find and merge duplicate faculty rows")
+    dedupe_cmd.add_argument('excel_path')
+    dedupe_cmd.add_argument('--cutoff', type=float, default=0.85, help="Similarity for near-duplicate names")
+    dedupe_cmd.add_argument('--output', help="Write the merged sheet here (default: report only)")
+    dedupe_cmd.add_argument('--sheet', default='Sheet1')
+    args = parser.parse_args()
+
+    try:
+        run(args)
+    except (KeyError, ValueError, OSError) as e:
+        # Unknown year column or sheet, or an unreadable workbook: one line instead of a traceback
+        parser.exit(1, f"Error: {e.args[0] if isinstance(e, KeyError) else e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Workbook Diff
+Shows what changed between two versions of a faculty workbook, e.g. the
+original and its '_updated_2024_2025' output.
+
+Rows are matched on the normalized faculty name and hashed as a whole, so
+unchanged rows are discarded in one vectorized pass; only rows whose hash
+differs are compared cell by cell.
+
+Usage: python workbook_diff.py OLD.xlsx NEW.xlsx [--sheet Sheet1] [--json]
+"""
+
+import argparse
+import json
+
+import pandas as pd
+
+import excel_io
+
+DIFF_COLUMNS = ['name', 'column', 'old', 'new']
+
+
+def _name_column(df, name_column=None):
+    found = excel_io.find_name_column(df.columns, [name_column] if name_column else None)
+    if found is None:
+        raise KeyError(f"No faculty name column found. Available columns: {list(df.columns)}")
+    return found
+
+
+def keyed_rows(df, name_column):
+    """
+    Index a sheet by normalized name (case, punctuation and spacing ignored).
+
+    Repeated names get an occurrence number, so duplicates are matched in
+    order instead of collapsing; rows without a name are dropped.
+    """
+    names = (df[name_column].astype('string').str.lower()
+             .str.replace(r'[^\w\s]', ' ', regex=True).str.split().str.join(' '))
+    named = names.notna() & names.ne('')
+    df, names = df[named], names[named]
+    keys = pd.MultiIndex.from_arrays([names, names.groupby(names).cumcount()], names=['key', 'occurrence'])
+    return df.set_index(keys)
+
+
+def row_hashes(df, columns):
+    """One 64-bit hash per row over the given columns, with values compared as text"""
+    values = df[columns].astype('string').fillna('')
+    return pd.util.hash_pandas_object(values, index=False)
+
+
+def diff_frames(old, new, name_column=None):
+    """
+    Diff two versions of a sheet.
+
+    Returns:
+        dict: added_columns, removed_columns, added_rows and removed_rows
+            (names), unchanged_rows (count) and changed_cells, a DataFrame of
+            name, column, old, new for every cell that differs in a row
+            present in both versions
+    """
+    old_name, new_name = _name_column(old, name_column), _name_column(new, name_column)
+    old_rows, new_rows = keyed_rows(old, old_name), keyed_rows(new, new_name)
+
+    columns = [col for col in old.columns if col in new.columns and col not in (old_name, new_name)]
+    common = old_rows.index.intersection(new_rows.index)
+    old_common, new_common = old_rows.loc[common], new_rows.loc[common]
+
+    changed = row_hashes(old_common, columns).to_numpy() != row_hashes(new_common, columns).to_numpy()
+    before, after = old_common.loc[changed, columns], new_common.loc[changed, columns]
+    differs = before.astype('string').fillna('').ne(after.astype('string').fillna('')).to_numpy(dtype=bool)
+
+    cells = pd.DataFrame({
+        'name': new_common.loc[changed, new_name].to_numpy().repeat(differs.sum(axis=1)),
+        'column': before.columns.to_numpy()[differs.nonzero()[1]],
+        'old': before.to_numpy()[differs],
+        'new': after.to_numpy()[differs],
+    }, columns=DIFF_COLUMNS)
+
+    return {
+        'added_columns': [col for col in new.columns if col not in old.columns],
+        'removed_columns': [col for col in old.columns if col not in new.columns],
+        'added_rows': new_rows.loc[new_rows.index.difference(old_rows.index, sort=False), new_name].tolist(),
+        'removed_rows': old_rows.loc[old_rows.index.difference(new_rows.index, sort=False), old_name].tolist(),
+        'unchanged_rows': int(len(common) - changed.sum()),
+        'changed_cells': cells,
+    }
+
+
+def diff_workbooks(old_path, new_path, sheet_name='Sheet1', name_column=None, reader=None):
+    """Read the same sheet of two workbooks and diff them (see diff_frames)"""
+    old = excel_io.read_excel(old_path, sheet_name=sheet_name, reader=reader)
+    new = excel_io.read_excel(new_path, sheet_name=sheet_name, reader=reader)
+    return diff_frames(old, new, name_column)
+
+
+def diff_to_json(diff):
+    """JSON-friendly copy of a diff (changed cells as records, missing values as None)"""
+    cells = diff['changed_cells']
+    return {**diff, 'changed_cells': cells.astype(object).where(cells.notna(), None).to_dict(orient='records')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two versions of a faculty workbook")
+    parser.add_argument('old', help="Original workbook")
+    parser.add_argument('new', help="Changed workbook")
+    parser.add_argument('--sheet', default='Sheet1')
+    parser.add_argument('--name-column', help="Name column to match rows on (default: 'Faculty name' or an alias)")
+    parser.add_argument('--json', action='store_true', help="Print the diff as JSON")
+    args = parser.parse_args()
+
+    diff = diff_workbooks(args.old, args.new, args.sheet, args.name_column)
+    if args.json:
+        print(json.dumps(diff_to_json(diff), indent=2, default=str, ensure_ascii=False))
+        return
+
+    cells = diff['changed_cells']
+    print(f"{args.old} -> {args.new} [{args.sheet}]")
+    print(f"  {len(diff['added_rows'])} rows added, {len(diff['removed_rows'])} removed, "
+          f"{cells['name'].nunique()} changed ({len(cells)} cells), {diff['unchanged_rows']} unchanged")
+    for label in ('added_columns', 'removed_columns', 'added_rows', 'removed_rows'):
+        if diff[label]:
+            print(f"  {label.replace('_', ' ').capitalize()}: {', '.join(map(str, diff[label]))}")
+    for record in cells.itertuples(index=False):
+        print(f"  ~ {record.name} [{record.column}]: {record.old} → {record.new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,19 @@ Handles all academic titles (including Clinical, Adjunct, Emeritus, etc.).
 import pandas as pd
 import os
 from pathlib import Path
+import sys
+
+# Shared Excel helpers live alongside the web app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Faculty-Excel-Converter"))
+import change_plan  # noqa: E402
+import excel_io  # noqa: E402
+import name_index  # noqa: E402
 
 def parse_title_change(change_string):
     """Return new title if change_string is like 'Old -> New'."""
     return change_string.split('->')[-1].strip() if '->' in change_string else change_string.strip()
 
-def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires):
+def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, dry_run=False, write_mode="frame", return_plan=False):
     """
     Update Excel with faculty resignations, promotions, and new hires.
 
@@ -23,22 +30,42 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
         resigned (list): Faculty names who resigned.
         title_changes (dict): name -> "old -> new" or just "new"
         new_hires (dict): name -> full title
+        dry_run (bool): Only compute the change plan, do not write a file
+        write_mode (str): "frame", "stream" (constant-memory writer for large outputs) or "patch" (keeps formatting)
+        return_plan (bool): Return the change plan instead of the list of changes
 
     Returns:
-        (bool, str, list): Success, message, list of changes
+        (bool, str, list): Success, message, list of changes ("RESIGNED: name: old → N", ...);
+            with return_plan=True the change plan DataFrame instead (see change_plan.make_plan)
     """
+    success, message, plan = _update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, dry_run=dry_run, write_mode=write_mode)
+    return success, message, plan if return_plan else change_plan.describe_plan(plan)
+
+def _update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, dry_run=False, write_mode="frame"):
+    """update_faculty_excel, always returning the change plan"""
     try:
+        # Outputs are named by a digest of their inputs, so identical runs reuse the existing file
+        p = Path(excel_path)
+        digest = excel_io.inputs_digest(
+            files=[excel_path],
+            params=[year_column, list(resigned), list(title_changes.items()), list(new_hires.items()), write_mode],
+        )
+        new_file = p.parent / f"{p.stem}_updated_{year_column.replace('-', '_')}_{digest}{p.suffix}"
+
+        # Validate the header row before loading the whole sheet
+        schema, error = excel_io.preflight(excel_path, year_column, sheet_name='Sheet1')
+        if schema is None:
+            return False, error, change_plan.make_plan()
+
         print("Reading Excel file...")
-        df = pd.read_excel(excel_path, sheet_name='Sheet1')
+        df = excel_io.read_excel(excel_path, sheet_name='Sheet1')
 
         if df.empty:
-            return False, "Excel file is empty or could not be read properly.", []
+            return False, "Excel file is empty or could not be read properly.", change_plan.make_plan()
 
-        if 'Faculty name' not in df.columns or year_column not in df.columns:
-            missing = 'Faculty name' if 'Faculty name' not in df.columns else year_column
-            return False, f"Error: '{missing}' column not found.", []
+        df = df.rename(columns={schema['name_column']: 'Faculty name'})
 
-        changes = []
+        records = []
 
         # 1. Process resignations and title changes
         for idx, row in df.iterrows():
@@ -49,43 +76,79 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
 
             if name in resigned:
                 df.at[idx, year_column] = 'N'
-                changes.append(f"RESIGNED: {name}: {current_value} → N")
+                records.append((change_plan.RESIGNED, name, idx, current_value, 'N'))
             elif name in title_changes:
                 new_title = parse_title_change(title_changes[name])
                 df.at[idx, year_column] = new_title
-                changes.append(f"TITLE CHANGE: {name}: {current_value} → {new_title}")
+                records.append((change_plan.TITLE_CHANGE, name, idx, current_value, new_title))
+
+        # Names the exact pass missed (e.g. initials vs. full first names) are resolved
+        # through a fuzzy index over the sheet's names, built once per run
+        index = name_index.NameIndex(df['Faculty name'])
+        known = set(df['Faculty name'].dropna())
+        touched = {record[2] for record in records}
+        unmatched = [(name, change_plan.RESIGNED, 'N') for name in resigned if name not in known]
+        unmatched += [(name, change_plan.TITLE_CHANGE, parse_title_change(change))
+                      for name, change in title_changes.items() if name not in known]
+        for name, action, new_value in unmatched:
+            match = index.lookup(name)
+            if match is None:
+                continue
+            if match.label in touched:
+                # The row already got an exact-match change; report the resolution rather than overwrite it
+                print(name_index.describe_skipped_match(name, match, "row already changed"))
+                continue
+            print(name_index.describe_match(name, match))
+            records.append((action, match.name, match.label, df.at[match.label, year_column], new_value,
+                            name, match.score))
+            df.at[match.label, year_column] = new_value
+            touched.add(match.label)
 
         # 2. Add/update new hires
         duplicates = []
         for name, full_title in new_hires.items():
             found = df[df['Faculty name'] == name]
-            if not found.empty:
-                idx = found.index[0]
+            match = index.lookup(name) if found.empty else None
+            if match is not None or not found.empty:
+                idx = found.index[0] if match is None else match.label
+                if match is not None:
+                    print(name_index.describe_match(name, match))
                 old = df.at[idx, year_column]
                 df.at[idx, year_column] = full_title
-                changes.append(f"UPDATED: {name}: {old} → {full_title}")
+                matched = (name, match.score) if match is not None else ()
+                records.append((change_plan.UPDATED, df.at[idx, 'Faculty name'], idx, old, full_title, *matched))
                 duplicates.append(name)
             else:
                 new_row = {'Faculty name': name, 'Department': 'Engineering', year_column: full_title}
                 for col in df.columns:
                     if col not in ('Faculty name', 'Department', year_column):
                         new_row[col] = 'N'
+                records.append((change_plan.NEW_HIRE, name, len(df), None, full_title))
                 df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                changes.append(f"NEW HIRE: {name} as {full_title}")
 
-        # Save file
-        p = Path(excel_path)
-        new_file = p.parent / f"{p.stem}_updated_{year_column.replace('-', '_')}{p.suffix}"
-        df.to_excel(new_file, index=False)
-        return True, f"File updated. Saved as {new_file}", changes
+        plan = change_plan.make_plan(records)
+        if dry_run:
+            return True, f"Dry run: {len(plan)} changes planned, workbook not modified", plan
+        if new_file.exists():
+            # Written by an earlier run with identical inputs: report its changes, skip the write
+            return True, f"Already up to date. Saved as {new_file}", plan
+
+        # Colour the changed cells: one conditional-format rule per action covering all of its cells
+        highlights = {'Sheet1': change_plan.plan_highlights(plan, df.columns, year_column)}
+
+        # Save file (atomically, so concurrent runs never see a partial workbook)
+        excel_io.write_atomic(new_file, lambda tmp_path: excel_io.write_excel(tmp_path, df, mode=write_mode, source=excel_path, highlights=highlights))
+        return True, f"File updated. Saved as {new_file}", plan
 
     except Exception as e:
-        return False, f"Error processing file: {e}", []
+        return False, f"Error processing file: {e}", change_plan.make_plan()
 
 def main():
     # Example usage (replace data as needed)
     excel_file = "Kansas State University.xlsx"
     year_col = "2019-2020"
+    dry_run = "--dry-run" in sys.argv[1:]  # preview the change plan only
+    write_mode = "stream" if "--stream" in sys.argv[1:] else "patch" if "--patch" in sys.argv[1:] else "frame"  # constant-memory writer, or keep formatting
 
 # RESIGNED FACULTY
     resigned_faculty = [
@@ -124,13 +187,15 @@ def main():
         print(f"ERROR: File '{excel_file}' not found!")
         return
 
-    success, msg, changes = update_faculty_excel(
-        excel_file, year_col, resigned_faculty, title_changes, new_hires
+    success, msg, plan = update_faculty_excel(
+        excel_file, year_col, resigned_faculty, title_changes, new_hires, dry_run=dry_run, write_mode=write_mode,
+        return_plan=True
     )
 
     if success:
         print("\n✅ SUCCESS!")
         print(msg)
+        changes = change_plan.describe_plan(plan)
         print(f"\nTotal changes: {len(changes)}")
         for change in changes[:15]:
             print(f"  - {change}")
@@ -138,18 +203,15 @@ def main():
             print(f"  ...and {len(changes)-15} more changes")
 
         # Stats
+        counts = change_plan.summarize_plan(plan)
         print("\nSummary:")
-        print(f"  Resignations: {len([c for c in changes if c.startswith('RESIGNED:')])}")
-        print(f"  Title Changes: {len([c for c in changes if c.startswith('TITLE CHANGE:')])}")
-        print(f"  Updated: {len([c for c in changes if c.startswith('UPDATED:')])}")
-        print(f"  New Hires: {len([c for c in changes if c.startswith('NEW HIRE:')])}")
+        print(f"  Resignations: {counts[change_plan.RESIGNED]}")
+        print(f"  Title Changes: {counts[change_plan.TITLE_CHANGE]}")
+        print(f"  Updated: {counts[change_plan.UPDATED]}")
+        print(f"  New Hires: {counts[change_plan.NEW_HIRE]}")
 
         # New hire title distribution
-        hire_titles = {}
-        for c in changes:
-            if c.startswith("NEW HIRE:"):
-                title = c.split(" as ")[-1]
-                hire_titles[title] = hire_titles.get(title, 0) + 1
+        hire_titles = plan.loc[plan['action'] == change_plan.NEW_HIRE, 'new'].value_counts().to_dict()
         if hire_titles:
             print("\nNew Hire Titles:")
             for title, count in hire_titles.items():
@@ -9,6 +9,13 @@ import pandas as pd
 import os
 from pathlib import Path
 import logging
+import sys
+
+# Shared Excel helpers live alongside the web app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Faculty-Excel-Converter"))
+import change_plan  # noqa: E402
+import excel_io  # noqa: E402
+import name_index  # noqa: E402
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,21 +33,7 @@ def normalize_name(name):
         return ""
     return name.strip().lower()
 
-def find_available_filename(base_path):
-    """Find an available filename by adding a counter if needed."""
-    path = Path(base_path)
-    if not path.exists():
-        return str(path)
-    
-    counter = 1
-    while True:
-        new_name = f"{path.stem}_{counter}{path.suffix}"
-        new_path = path.parent / new_name
-        if not new_path.exists():
-            return str(new_path)
-        counter += 1
-
-def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, default_department="Engineering"):
+def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, default_department="Engineering", dry_run=False, write_mode="frame", return_plan=False):
     """
     Update Excel with faculty resignations, promotions, and new hires.
 
@@ -51,47 +44,50 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
         title_changes (dict): name -> "old -> new" or just "new"
         new_hires (dict): name -> full title
         default_department (str): Default department for new hires
+        dry_run (bool): Only compute the change plan, do not write a file
+        write_mode (str): "frame", "stream" (constant-memory writer for large outputs) or "patch" (keeps formatting)
+        return_plan (bool): Return the change plan instead of the list of changes
 
     Returns:
-        (bool, str, list): Success, message, list of changes
+        (bool, str, list): Success, message, list of changes ("RESIGNED: name: old → N", ...);
+            with return_plan=True the change plan DataFrame instead (see change_plan.make_plan)
     """
+    success, message, plan = _update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, default_department=default_department, dry_run=dry_run, write_mode=write_mode)
+    return success, message, plan if return_plan else change_plan.describe_plan(plan)
+
+def _update_faculty_excel(excel_path, year_column, resigned, title_changes, new_hires, default_department="Engineering", dry_run=False, write_mode="frame"):
+    """update_faculty_excel, always returning the change plan"""
     try:
+        # Outputs are named by a digest of their inputs, so identical runs reuse the existing file
+        p = Path(excel_path)
+        digest = excel_io.inputs_digest(
+            files=[excel_path],
+            params=[year_column, list(resigned), list(title_changes.items()), list(new_hires.items()), default_department,
+                    write_mode],
+        )
+        new_file = p.parent / f"{p.stem}_updated_{year_column.replace('-', '_')}_{digest}{p.suffix}"
+
+        # Validate the header row before loading the whole sheet
+        try:
+            schema, error = excel_io.preflight(excel_path, year_column)
+        except Exception as e:
+            return False, f"Error reading Excel file: {e}", change_plan.make_plan()
+        if schema is None:
+            return False, error, change_plan.make_plan()
+        sheet_name = schema['sheet']
+        logger.info(f"Using sheet: {sheet_name}")
+
         logger.info("Reading Excel file...")
-        
-        # Try to read the Excel file, handle different sheet scenarios
         try:
-            # First try to read all sheets to see what's available
-            xl_file = pd.ExcelFile(excel_path)
-            sheet_names = xl_file.sheet_names
-            logger.info(f"Available sheets: {sheet_names}")
-            
-            # Use the first sheet if Sheet1 doesn't exist
-            sheet_name = 'Sheet1' if 'Sheet1' in sheet_names else sheet_names[0]
-            df = pd.read_excel(excel_path, sheet_name=sheet_name)
-            logger.info(f"Using sheet: {sheet_name}")
-            
+            df = excel_io.read_excel(excel_path, sheet_name=sheet_name)
         except Exception as e:
-            return False, f"Error reading Excel file: {e}", []
+            return False, f"Error reading Excel file: {e}", change_plan.make_plan()
 
         if df.empty:
-            return False, "Excel file is empty or could not be read properly.", []
-
-        # Check for required columns
-        if 'Faculty name' not in df.columns:
-            # Try alternative column names
-            possible_names = ['Faculty Name', 'Name', 'faculty name', 'faculty_name']
-            found_col = None
-            for col in possible_names:
-                if col in df.columns:
-                    df = df.rename(columns={col: 'Faculty name'})
-                    found_col = col
-                    break
-            
-            if not found_col:
-                return False, "Error: No faculty name column found. Expected 'Faculty name' or similar.", []
-
-        if year_column not in df.columns:
-            return False, f"Error: '{year_column}' column not found. Available columns: {list(df.columns)}", []
+            return False, "Excel file is empty or could not be read properly.", change_plan.make_plan()
+
+        # Accept the aliased name column under the canonical name
+        df = df.rename(columns={schema['name_column']: 'Faculty name'})
 
         # Create name mapping for case-insensitive lookup
         name_to_index = {}
@@ -102,7 +98,7 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
                 if normalized:
                     name_to_index[normalized] = idx
 
-        changes = []
+        records = []
         
         # Normalize input names for matching
         resigned_normalized = {normalize_name(name): name for name in resigned}
@@ -121,23 +117,51 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
             if normalized_name in resigned_normalized:
                 original_name = resigned_normalized[normalized_name]
                 df.at[idx, year_column] = 'N'
-                changes.append(f"RESIGNED: {name}: {current_value} → N")
+                records.append((change_plan.RESIGNED, name, idx, current_value, 'N'))
                 
             elif normalized_name in title_changes_normalized:
                 original_name, change = title_changes_normalized[normalized_name]
                 new_title = parse_title_change(change)
                 df.at[idx, year_column] = new_title
-                changes.append(f"TITLE CHANGE: {name}: {current_value} → {new_title}")
+                records.append((change_plan.TITLE_CHANGE, name, idx, current_value, new_title))
+
+        # Names the exact pass missed (e.g. initials vs. full first names) are resolved
+        # through a fuzzy index over the sheet's names, built once per run
+        index = name_index.NameIndex(df['Faculty name'])
+        touched = {record[2] for record in records}
+        unmatched = [(original_name, change_plan.RESIGNED, 'N')
+                     for normalized_name, original_name in resigned_normalized.items()
+                     if normalized_name not in name_to_index]
+        unmatched += [(original_name, change_plan.TITLE_CHANGE, parse_title_change(change))
+                      for normalized_name, (original_name, change) in title_changes_normalized.items()
+                      if normalized_name not in name_to_index]
+        for original_name, action, new_value in unmatched:
+            match = index.lookup(original_name)
+            if match is None:
+                continue
+            if match.label in touched:
+                # The row already got an exact-match change; report the resolution rather than overwrite it
+                logger.warning(name_index.describe_skipped_match(original_name, match, "row already changed"))
+                continue
+            logger.info(name_index.describe_match(original_name, match))
+            records.append((action, match.name, match.label, df.at[match.label, year_column], new_value,
+                            original_name, match.score))
+            df.at[match.label, year_column] = new_value
+            touched.add(match.label)
 
         # 2. Collect new hires that aren't already in the DataFrame
         new_rows_data = []
         for normalized_name, (original_name, full_title) in new_hires_normalized.items():
-            if normalized_name in name_to_index:
+            match = None if normalized_name in name_to_index else index.lookup(original_name)
+            if match is not None or normalized_name in name_to_index:
                 # Update existing faculty member
-                idx = name_to_index[normalized_name]
+                idx = name_to_index[normalized_name] if match is None else match.label
+                if match is not None:
+                    logger.info(name_index.describe_match(original_name, match))
                 old_value = df.at[idx, year_column]
                 df.at[idx, year_column] = full_title
-                changes.append(f"UPDATED: {df.at[idx, 'Faculty name']}: {old_value} → {full_title}")
+                matched = (original_name, match.score) if match is not None else ()
+                records.append((change_plan.UPDATED, df.at[idx, 'Faculty name'], idx, old_value, full_title, *matched))
             else:
                 # Prepare new row data
                 new_row = {'Faculty name': original_name, year_column: full_title}
@@ -151,35 +175,43 @@ def update_faculty_excel(excel_path, year_column, resigned, title_changes, new_h
                     if col not in new_row:
                         new_row[col] = 'N'
                 
+                records.append((change_plan.NEW_HIRE, original_name, len(df) + len(new_rows_data), None, full_title))
                 new_rows_data.append(new_row)
-                changes.append(f"NEW HIRE: {original_name} as {full_title}")
 
         # Add all new rows at once (more efficient)
         if new_rows_data:
             new_df = pd.DataFrame(new_rows_data)
             df = pd.concat([df, new_df], ignore_index=True)
 
-        # Save file with safe filename
-        p = Path(excel_path)
-        suggested_name = p.parent / f"{p.stem}_updated_{year_column.replace('-', '_')}{p.suffix}"
-        new_file = find_available_filename(suggested_name)
-        
-        df.to_excel(new_file, index=False, sheet_name=sheet_name if 'sheet_name' in locals() else 'Sheet1')
+        plan = change_plan.make_plan(records)
+        if dry_run:
+            return True, f"Dry run: {len(plan)} changes planned, workbook not modified", plan
+        if new_file.exists():
+            # Written by an earlier run with identical inputs: report its changes, skip the write
+            return True, f"Already up to date. Saved as {new_file}", plan
+
+        # Colour the changed cells: one conditional-format rule per action covering all of its cells
+        highlights = {sheet_name: change_plan.plan_highlights(plan, df.columns, year_column)}
+
+        # Save file (atomically, so concurrent runs never see a partial workbook)
+        excel_io.write_atomic(new_file, lambda tmp_path: excel_io.write_excel(tmp_path, [(sheet_name, df)], mode=write_mode, source=excel_path, highlights=highlights))
         
-        return True, f"File updated successfully. Saved as {new_file}", changes
+        return True, f"File updated successfully. Saved as {new_file}", plan
 
     except FileNotFoundError:
-        return False, f"Error: File '{excel_path}' not found.", []
+        return False, f"Error: File '{excel_path}' not found.", change_plan.make_plan()
     except PermissionError:
-        return False, f"Error: Permission denied accessing '{excel_path}'. File may be open in another application.", []
+        return False, f"Error: Permission denied accessing '{excel_path}'. File may be open in another application.", change_plan.make_plan()
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        return False, f"Error processing file: {e}", []
+        return False, f"Error processing file: {e}", change_plan.make_plan()
 
 def main():
     # Example usage (replace data as needed)
     excel_file = "University of Alabama.xlsx"
     year_col = "2024-2025" 
+    dry_run = "--dry-run" in sys.argv[1:]  # preview the change plan only
+    write_mode = "stream" if "--stream" in sys.argv[1:] else "patch" if "--patch" in sys.argv[1:] else "frame"  # constant-memory writer, or keep formatting
 
 
 
@@ -241,13 +273,15 @@ def main():
         print("Please ensure the Excel file is in the same directory as this script.")
         return
 
-    success, msg, changes = update_faculty_excel(
-        excel_file, year_col, resigned_faculty, title_changes, new_hires
+    success, msg, plan = update_faculty_excel(
+        excel_file, year_col, resigned_faculty, title_changes, new_hires, dry_run=dry_run, write_mode=write_mode,
+        return_plan=True
     )
 
     if success:
         print("\n✅ SUCCESS!")
         print(msg)
+        changes = change_plan.describe_plan(plan)
         print(f"\nTotal changes: {len(changes)}")
         
         # Show first 15 changes
@@ -257,10 +291,11 @@ def main():
             print(f"  ...and {len(changes)-15} more changes")
 
         # Stats
-        resignations = len([c for c in changes if c.startswith('RESIGNED:')])
-        title_changes_count = len([c for c in changes if c.startswith('TITLE CHANGE:')])
-        updates = len([c for c in changes if c.startswith('UPDATED:')])
-        new_hires_count = len([c for c in changes if c.startswith('NEW HIRE:')])
+        counts = change_plan.summarize_plan(plan)
+        resignations = counts[change_plan.RESIGNED]
+        title_changes_count = counts[change_plan.TITLE_CHANGE]
+        updates = counts[change_plan.UPDATED]
+        new_hires_count = counts[change_plan.NEW_HIRE]
         
         print("\nSummary:")
         print(f"  Resignations: {resignations}")
@@ -269,14 +304,7 @@ def main():
         print(f"  New Hires: {new_hires_count}")
 
         # New hire title distribution
-        hire_titles = {}
-        for c in changes:
-            if c.startswith("NEW HIRE:"):
-                try:
-                    title = c.split(" as ")[-1]
-                    hire_titles[title] = hire_titles.get(title, 0) + 1
-                except IndexError:
-                    continue
+        hire_titles = plan.loc[plan['action'] == change_plan.NEW_HIRE, 'new'].value_counts().to_dict()
                     
         if hire_titles:
             print("\nNew Hire Title Distribution:")